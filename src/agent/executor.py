@@ -1,18 +1,42 @@
-from typing import Any
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable
+import sys
 import time
 from src.core.config import Config
 from src.core.logging_setup import get_logger
-from src.agent.state import AgentState, Task, TaskStatus
+from src.agent.state import AgentState, RetryPolicy, Task, TaskStatus
+from src.agent.tool_registry import COMPUTER_USE_TOOLS, TOOL_SPECS
 from src.agent.tools import AgentTools
 
 logger = get_logger(__name__)
 
+NON_RETRYABLE_ERRORS = (ValueError, PermissionError)
+
+# Desktop automation tools share one screen/cursor and must never run concurrently.
+NON_REENTRANT_TOOLS = COMPUTER_USE_TOOLS
+
+def _result_size(obj: Any) -> int:
+    # Cheap size for logging: element/char count for sized builtins, buffer size for arrays
+    if isinstance(obj, (str, bytes, list, dict)):
+        return len(obj)
+    nbytes = getattr(obj, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+    return sys.getsizeof(obj)
+
 class Executor:
     def __init__(self, config: Config | None = None):
         self.config = config or Config()
         self.tools = AgentTools(config=self.config)
+        self._tool_map = self._build_tool_map()
         self.max_retries = self.config.MAX_RETRIES
-        self.retry_delay = self.config.RETRY_DELAY_SECONDS
+        self.max_parallel_tasks = max(1, self.config.MAX_PARALLEL_TASKS)
+        self.retry_policy = RetryPolicy(
+            initial_delay_ms=self.config.RETRY_DELAY_SECONDS * 1000,
+            max_delay_ms=self.config.RETRY_MAX_DELAY_SECONDS * 1000,
+            multiplier=self.config.RETRY_BACKOFF_MULTIPLIER,
+        )
 
     def execute_task(self, task: Task, state: AgentState) -> Any:
         logger.info("executing_task", task_id=task.id, tool=task.tool, description=task.description)
@@ -23,44 +47,42 @@ class Executor:
         
         task.status = TaskStatus.IN_PROGRESS
         
-        try:
-            result = self._execute_tool(task, state)
-            
-            logger.info("task_completed", task_id=task.id, result_size=len(str(result)))
-            return result
-            
-        except Exception as e:
-            task.retry_count += 1
-            logger.error("task_execution_failed", task_id=task.id, error=str(e), retry_count=task.retry_count)
-            
-            if task.retry_count < self.max_retries:
-                logger.info("retrying_task", task_id=task.id, retry_count=task.retry_count)
-                time.sleep(self.retry_delay * task.retry_count)
-                return self.execute_task(task, state)
-            else:
+        while True:
+            try:
+                result = self._execute_tool(task, state)
+                
+                logger.info("task_completed", task_id=task.id, result_size=_result_size(result))
+                return result
+                
+            except NON_RETRYABLE_ERRORS as e:
+                logger.error("task_execution_failed", task_id=task.id, error=str(e), retryable=False, exc_info=e)
                 raise
+                
+            except Exception as e:
+                task.retry_count += 1
+                exhausted = task.retry_count >= self.max_retries
+                # Only the final attempt carries the traceback; earlier ones just record the message
+                logger.error(
+                    "task_execution_failed", task_id=task.id, error=str(e), retry_count=task.retry_count,
+                    exc_info=e if exhausted else None,
+                )
+                
+                if exhausted:
+                    raise
+                
+                task.prev_sleep_ms = self.retry_policy.next_delay_ms(task.prev_sleep_ms)
+                logger.info("retrying_task", task_id=task.id, retry_count=task.retry_count, delay_ms=round(task.prev_sleep_ms))
+                time.sleep(task.prev_sleep_ms / 1000)
 
-    def _execute_tool(self, task: Task, state: AgentState) -> Any:
-        tool_map = {
-            "document_search": self.tools.document_search,
-            "code_execution": self.tools.code_execution,
-            "bash_command": self.tools.bash_command,
-            "web_search": self.tools.web_search,
-            "file_read": self.tools.file_read,
-            "file_write": self.tools.file_write,
+    def _build_tool_map(self) -> dict[str, Callable[..., Any]]:
+        return {
+            name: spec.getter(self.tools)
+            for name, spec in TOOL_SPECS.items()
+            if self.tools.computer_use or not spec.computer_use
         }
-        
-        if self.tools.computer_use:
-            tool_map.update({
-                "screenshot": self.tools.screenshot,
-                "mouse_move": self.tools.mouse_move,
-                "mouse_click": self.tools.mouse_click,
-                "keyboard_type": self.tools.keyboard_type,
-                "keyboard_press": self.tools.keyboard_press,
-                "keyboard_hotkey": self.tools.keyboard_hotkey,
-            })
-        
-        tool_func = tool_map.get(task.tool)
+
+    def _execute_tool(self, task: Task, state: AgentState) -> Any:
+        tool_func = self._tool_map.get(task.tool)
         if not tool_func:
             raise ValueError(f"Unknown tool: {task.tool}")
         
@@ -72,43 +94,90 @@ class Executor:
             raise ValueError(f"Invalid tool input for {task.tool}: {e}")
 
     def execute_plan(self, state: AgentState) -> dict[str, Any]:
-        logger.info("executing_plan", task_count=len(state.current_plan))
+        logger.info("executing_plan", task_count=len(state.current_plan), max_parallel=self.max_parallel_tasks)
         
         results = {}
         failed_tasks = []
         
-        while state.current_plan and state.should_continue():
-            next_task = state.get_next_task()
-            
-            if not next_task:
-                blocked_tasks = [t for t in state.current_plan if t.status == TaskStatus.PENDING]
-                if blocked_tasks:
-                    logger.error("tasks_blocked", blocked_count=len(blocked_tasks))
-                    for task in blocked_tasks:
-                        task.status = TaskStatus.BLOCKED
-                break
-            
-            try:
-                result = self.execute_task(next_task, state)
-                state.mark_task_complete(next_task.id, result)
-                results[next_task.id] = result
-                state.tool_outputs[next_task.id] = result
+        tasks = {t.id: t for t in state.current_plan if t.status == TaskStatus.PENDING}
+        indegree: dict[str, int] = {}
+        dependents: dict[str, list[str]] = defaultdict(list)
+        for task in tasks.values():
+            unmet = [dep_id for dep_id in task.dependencies if not state.is_task_completed(dep_id)]
+            indegree[task.id] = len(unmet)
+            for dep_id in unmet:
+                dependents[dep_id].append(task.id)
+        
+        ready = deque(task_id for task_id, count in indegree.items() if count == 0)
+        exclusive_ready: deque[str] = deque()
+        running: dict[Future, Task] = {}
+        halted = False
+        
+        # All state mutations happen on this thread as futures complete; workers only run tools.
+        with ThreadPoolExecutor(max_workers=self.max_parallel_tasks) as pool:
+            while ready or exclusive_ready or running:
+                if not halted and state.should_continue():
+                    exclusive_active = any(t.tool in NON_REENTRANT_TOOLS for t in running.values())
+                    while ready and not exclusive_active and state.iteration_count + len(running) < state.max_iterations:
+                        task = tasks[ready.popleft()]
+                        if task.tool in NON_REENTRANT_TOOLS:
+                            exclusive_ready.append(task.id)
+                        else:
+                            running[pool.submit(self.execute_task, task, state)] = task
+                    
+                    if exclusive_ready and not running and state.iteration_count < state.max_iterations:
+                        task = tasks[exclusive_ready.popleft()]
+                        running[pool.submit(self.execute_task, task, state)] = task
                 
-            except PermissionError as e:
-                logger.warning("task_awaiting_approval", task_id=next_task.id)
-                break
+                if not running:
+                    break
                 
-            except Exception as e:
-                logger.error("task_failed", task_id=next_task.id, error=str(e))
-                state.mark_task_failed(next_task.id, str(e))
-                failed_tasks.append(next_task)
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = running.pop(future)
+                    
+                    try:
+                        result = future.result()
+                        
+                    except PermissionError as e:
+                        logger.warning("task_awaiting_approval", task_id=task.id)
+                        halted = True
+                        continue
+                        
+                    except Exception as e:
+                        err_str = str(e)
+                        logger.error("task_failed", task_id=task.id, error=err_str)
+                        state.mark_task_failed(task.id, err_str)
+                        failed_tasks.append(task)
+                        state.iteration_count += 1
+                        
+                        if task.risk_level.value in ["high", "critical"]:
+                            logger.error("critical_task_failed", task_id=task.id)
+                            state.error = f"Critical task {task.id} failed: {err_str}"
+                            halted = True
+                        continue
+                    
+                    state.mark_task_complete(task.id, result)
+                    results[task.id] = result
+                    state.tool_outputs[task.id] = result
+                    state.iteration_count += 1
+                    
+                    for dependent_id in dependents.get(task.id, ()):
+                        indegree[dependent_id] -= 1
+                        if indegree[dependent_id] == 0:
+                            ready.append(dependent_id)
                 
-                if next_task.risk_level.value in ["high", "critical"]:
-                    logger.error("critical_task_failed", task_id=next_task.id)
-                    state.error = f"Critical task {next_task.id} failed: {e}"
-                    break
-            
-            state.iteration_count += 1
+                if halted:
+                    for future in [f for f in running if f.cancel()]:
+                        running.pop(future)
+        
+        # Once the ready queue drains, anything still waiting on a dependency is blocked
+        if not halted and state.should_continue():
+            blocked_tasks = [tasks[task_id] for task_id, count in indegree.items() if count > 0]
+            if blocked_tasks:
+                logger.error("tasks_blocked", blocked_count=len(blocked_tasks))
+                for task in blocked_tasks:
+                    task.status = TaskStatus.BLOCKED
         
         execution_summary = {
             "completed": len(state.completed_tasks),
@@ -124,39 +193,21 @@ class Executor:
     def execute_single_tool(self, tool_name: str, tool_input: dict[str, Any]) -> Any:
         logger.info("executing_single_tool", tool=tool_name, input=tool_input)
         
-        tool_map = {
-            "document_search": self.tools.document_search,
-            "code_execution": self.tools.code_execution,
-            "bash_command": self.tools.bash_command,
-            "web_search": self.tools.web_search,
-            "file_read": self.tools.file_read,
-            "file_write": self.tools.file_write,
-        }
-        
-        tool_func = tool_map.get(tool_name)
+        tool_func = self._tool_map.get(tool_name)
         if not tool_func:
             raise ValueError(f"Unknown tool: {tool_name}")
         
         try:
             result = tool_func(**tool_input)
-            logger.info("tool_executed", tool=tool_name, result_size=len(str(result)))
+            logger.info("tool_executed", tool=tool_name, result_size=_result_size(result))
             return result
         except Exception as e:
             logger.error("tool_execution_failed", tool=tool_name, error=str(e))
             raise
 
     def validate_task_inputs(self, task: Task) -> tuple[bool, str | None]:
-        required_inputs = {
-            "document_search": ["query"],
-            "code_execution": ["code"],
-            "bash_command": ["command"],
-            "web_search": ["query"],
-            "file_read": ["path"],
-            "file_write": ["path", "content"],
-        }
-        
-        required = required_inputs.get(task.tool, [])
-        missing = [field for field in required if field not in task.tool_input]
+        spec = TOOL_SPECS.get(task.tool)
+        missing = [field for field in spec.required if field not in task.tool_input] if spec else []
         
         if missing:
             error_msg = f"Missing required inputs for {task.tool}: {missing}"
@@ -1,8 +1,14 @@
+import contextvars
+import io
+import reprlib
 import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
+from secrets import token_hex
 import anthropic
 from typing import Any
 from src.core.config import Config
+from src.core.llm_client import get_anthropic_client
 from src.core.logging_setup import get_logger, set_correlation_id
 from src.agent.state import AgentState, Message, Task, TaskStatus
 from src.agent.planner import Planner
@@ -12,11 +18,26 @@ from src.sentinel.auditor import Auditor
 
 logger = get_logger(__name__)
 
+_RESULT_PREVIEW_CHARS = 500
+
+# reprlib bounds containers while formatting, so large tool results are never fully stringified
+_result_repr = reprlib.Repr()
+_result_repr.maxstring = _RESULT_PREVIEW_CHARS
+_result_repr.maxother = _RESULT_PREVIEW_CHARS
+_result_repr.maxlist = 5
+_result_repr.maxdict = 5
+
+
+def _trunc(obj: Any, n: int = _RESULT_PREVIEW_CHARS) -> str:
+    if isinstance(obj, str):
+        return obj[:n]
+    return _result_repr.repr(obj)[:n]
+
 class AgentOrchestrator:
     def __init__(self, config: Config | None = None, session_id: str | None = None):
         self.config = config or Config()
         self.session_id = session_id or str(uuid.uuid4())
-        self.correlation_id = str(uuid.uuid4())
+        self.correlation_id = token_hex(16)
         set_correlation_id(self.correlation_id)
         
         self.planner = Planner(config=self.config)
@@ -32,12 +53,17 @@ class AgentOrchestrator:
                 logger.info("continuing_without_guardrails")
         
         self.auditor = Auditor(config=self.config)
-        self.client = anthropic.Anthropic(api_key=self.config.ANTHROPIC_API_KEY)
+        self.client = get_anthropic_client(self.config)
+        
+        self._plan_pool: ThreadPoolExecutor | None = None
+        if self.config.SPECULATIVE_PLANNING and self.guardrails:
+            self._plan_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="speculative-plan")
         
         self.state = AgentState(
             session_id=self.session_id,
             correlation_id=self.correlation_id,
-            max_iterations=self.config.MAX_ITERATIONS
+            max_iterations=self.config.MAX_ITERATIONS,
+            max_context_messages=self.config.MAX_CONVERSATION_MESSAGES
         )
         
         logger.info("orchestrator_initialized", session_id=self.session_id, correlation_id=self.correlation_id)
@@ -47,16 +73,26 @@ class AgentOrchestrator:
         
         self.state.add_message("user", user_input)
         
+        # Planning only reads the conversation, so it can overlap input validation.
+        # A plan already running cannot be cancelled: a blocked input still reaches the
+        # planner model, only the resulting plan is discarded
+        speculative_plan: Future | None = None
+        if self._plan_pool is not None:
+            speculative_plan = self._plan_pool.submit(contextvars.copy_context().run, self.planner.create_plan, self.state)
+        
         if self.config.ENABLE_GUARDRAILS and self.guardrails:
             is_safe, violation_reason = self.guardrails.validate_input(user_input)
             if not is_safe:
                 logger.warning("input_blocked_by_guardrails", reason=violation_reason)
+                if speculative_plan is not None:
+                    speculative_plan.cancel()
+                    logger.info("speculative_plan_discarded")
                 self.state.add_guardrail_violation("input_validation", {"reason": violation_reason})
                 return f"Request blocked by security guardrails: {violation_reason}"
         
         try:
-            plan = self.planner.create_plan(self.state)
-            self.state.current_plan = plan
+            plan = speculative_plan.result() if speculative_plan is not None else self.planner.create_plan(self.state)
+            self.state.set_plan(plan)
             
             logger.info("plan_created", task_count=len(plan))
             
@@ -80,8 +116,9 @@ class AgentOrchestrator:
             return response
             
         except Exception as e:
-            logger.error("message_processing_failed", error=str(e))
-            error_msg = f"Error processing request: {str(e)}"
+            err_str = str(e)
+            logger.error("message_processing_failed", error=err_str, exc_info=e)
+            error_msg = f"Error processing request: {err_str}"
             self.state.error = error_msg
             return error_msg
 
@@ -111,10 +148,9 @@ Use these commands to approve/deny:
         logger.info("approving_task_via_orchestrator", task_id=task_id)
         
         if self.auditor.approve_task(task_id, reason):
-            for task in self.state.current_plan:
-                if task.id == task_id:
-                    task.approved = True
-                    break
+            task = self.state.get_task(task_id)
+            if task is not None:
+                task.approved = True
             
             return f"Task {task_id} approved. Continue execution with 'continue' command."
         else:
@@ -124,7 +160,7 @@ Use these commands to approve/deny:
         logger.info("denying_task_via_orchestrator", task_id=task_id)
         
         if self.auditor.deny_task(task_id, reason):
-            self.state.current_plan = [t for t in self.state.current_plan if t.id != task_id]
+            self.state.remove_task(task_id)
             return f"Task {task_id} denied and removed from plan."
         else:
             return f"Task {task_id} not found in pending approvals."
@@ -146,48 +182,51 @@ Use these commands to approve/deny:
     def _generate_response(self, execution_summary: dict[str, Any]) -> str:
         logger.info("generating_response", completed=execution_summary["completed"], failed=execution_summary["failed"])
         
-        context_docs = "\n\n".join([f"Document {i+1}:\n{doc.get('text', '')[:500]}" for i, doc in enumerate(self.state.context_documents[:3])])
-        
-        tool_results = "\n\n".join([f"Tool: {task_id}\nResult: {str(result)[:500]}" for task_id, result in execution_summary["results"].items()])
-        
-        conversation_history = self.state.get_conversation_context()
-        
-        synthesis_prompt = f"""Synthesize the following information into a helpful response for the user.
-
-Conversation History:
-{conversation_history}
-
-Execution Results:
-Completed: {execution_summary["completed"]}
-Failed: {execution_summary["failed"]}
-
-Tool Outputs:
-{tool_results}
-
-Context Documents:
-{context_docs}
-
-Provide a clear, concise response that answers the user's question using the execution results and context."""
-
         try:
-            response = self.client.messages.create(
-                model=self.config.ANTHROPIC_MODEL,
-                max_tokens=self.config.MAX_TOKENS,
-                temperature=self.config.TEMPERATURE,
-                messages=[{"role": "user", "content": synthesis_prompt}]
-            )
-            
+            response = self.client.messages.create(**self._synthesis_request(execution_summary))
             return response.content[0].text
             
         except anthropic.APIError as e:
-            logger.error("response_generation_failed", error=str(e))
-            return f"Execution completed but response generation failed: {str(e)}"
+            err_str = str(e)
+            logger.error("response_generation_failed", error=err_str)
+            return f"Execution completed but response generation failed: {err_str}"
+
+    def _synthesis_request(self, execution_summary: dict[str, Any]) -> dict[str, Any]:
+        buf = io.StringIO()
+        buf.write("Synthesize the following information into a helpful response for the user.\n\n")
+        buf.write(f"Conversation History:\n{self.state.get_conversation_context()}\n\n")
+        buf.write(
+            f"Execution Results:\nCompleted: {execution_summary['completed']}\n"
+            f"Failed: {execution_summary['failed']}\n\n"
+        )
+        
+        buf.write("Tool Outputs:\n")
+        for i, (task_id, result) in enumerate(execution_summary["results"].items()):
+            if i:
+                buf.write("\n\n")
+            buf.write(f"Tool: {task_id}\nResult: {_trunc(result)}")
+        
+        buf.write("\n\nContext Documents:\n")
+        for i, doc in enumerate(self.state.context_documents[:3]):
+            if i:
+                buf.write("\n\n")
+            buf.write(f"Document {i+1}:\n{_trunc(doc.get('text', ''))}")
+        
+        buf.write("\n\nProvide a clear, concise response that answers the user's question using the execution results and context.")
+        synthesis_prompt = buf.getvalue()
+
+        return {
+            "model": self.config.ANTHROPIC_MODEL,
+            "max_tokens": self.config.MAX_TOKENS,
+            "temperature": self.config.TEMPERATURE,
+            "messages": [{"role": "user", "content": synthesis_prompt}],
+        }
 
     def get_session_stats(self) -> dict[str, Any]:
         return {
             "session_id": self.session_id,
             "correlation_id": self.correlation_id,
-            "total_messages": len(self.state.messages),
+            "total_messages": self.state.message_count,
             "completed_tasks": len(self.state.completed_tasks),
             "pending_tasks": len(self.state.current_plan),
             "iterations": self.state.iteration_count,
@@ -200,13 +239,19 @@ Provide a clear, concise response that answers the user's question using the exe
         logger.info("resetting_session", old_session_id=self.session_id)
         
         self.session_id = str(uuid.uuid4())
-        self.correlation_id = str(uuid.uuid4())
+        self.correlation_id = token_hex(16)
         set_correlation_id(self.correlation_id)
         
         self.state = AgentState(
             session_id=self.session_id,
             correlation_id=self.correlation_id,
-            max_iterations=self.config.MAX_ITERATIONS
+            max_iterations=self.config.MAX_ITERATIONS,
+            max_context_messages=self.config.MAX_CONVERSATION_MESSAGES
         )
         
         logger.info("session_reset_complete", new_session_id=self.session_id)
+
+    def close(self) -> None:
+        if self._plan_pool is not None:
+            self._plan_pool.shutdown(wait=False, cancel_futures=True)
+            self._plan_pool = None
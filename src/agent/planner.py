@@ -1,35 +1,52 @@
+import binascii
 import json
-import uuid
-from typing import Any
+import os
+import re
+from typing import Any, Iterator
 import anthropic
 from src.core.config import Config
+from src.core.llm_client import get_anthropic_client
 from src.core.logging_setup import get_logger
 from src.agent.state import AgentState, Task, TaskStatus, RiskLevel
+from src.agent.tool_registry import enabled_tools
 
 logger = get_logger(__name__)
 
-class Planner:
-    def __init__(self, config: Config | None = None):
-        self.config = config or Config()
-        self.client = anthropic.Anthropic(api_key=self.config.ANTHROPIC_API_KEY)
-        self.max_retries = self.config.MAX_RETRIES
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 
-    def create_plan(self, state: AgentState) -> list[Task]:
-        logger.info("generating_plan", user_query=state.messages[-1].content if state.messages else "")
-        
-        system_prompt = self._build_system_prompt()
-        user_query = state.messages[-1].content if state.messages else ""
-        conversation_context = state.get_conversation_context()
-        
-        planning_prompt = f"""Analyze the user's request and create a detailed execution plan.
+# Greedy span from the first "[" to the last "]": drops markdown fences and any prose
+# around the array in one scan. orjson.JSONDecodeError subclasses json.JSONDecodeError.
+_JSON_ARRAY_RE = re.compile(r"\[.*\]", re.DOTALL)
 
-User Request: {user_query}
+_APPROVAL_RISK_LEVELS = frozenset({RiskLevel.HIGH, RiskLevel.CRITICAL})
 
-Conversation History:
-{conversation_context}
 
-Available Documents: {len(state.context_documents)}
+def _random_task_ids(count: int) -> Iterator[str]:
+    # One urandom read for every id the plan is missing instead of a uuid4() per task
+    hexed = binascii.hexlify(os.urandom(4 * count)).decode()
+    for i in range(0, len(hexed), 8):
+        yield f"task_{hexed[i:i + 8]}"
 
+
+def _task_kwargs(item: dict[str, Any], fallback_ids: Iterator[str]) -> dict[str, Any]:
+    risk_level = RiskLevel(item.get("risk_level", "low"))
+    return {
+        "id": item.get("id") or next(fallback_ids),
+        "description": item["description"],
+        "tool": item["tool"],
+        "tool_input": item["tool_input"],
+        "dependencies": item.get("dependencies", []),
+        "risk_level": risk_level,
+        "requires_approval": risk_level in _APPROVAL_RISK_LEVELS,
+    }
+
+
+class Planner:
+    PLANNING_INSTRUCTIONS = """
 Create a step-by-step plan to fulfill this request. For each step, provide:
 1. A clear description
 2. The tool to use
@@ -38,22 +55,21 @@ Create a step-by-step plan to fulfill this request. For each step, provide:
 5. Risk level (low, medium, high, critical)
 
 Available Tools: document_search, code_execution, bash_command, web_search, file_read, file_write"""
-        
-        if self.config.ENABLE_COMPUTER_USE:
-            planning_prompt += ", screenshot, mouse_move, mouse_click, keyboard_type, keyboard_press, keyboard_hotkey"
-        
-        planning_prompt += """
+
+    COMPUTER_USE_TOOLS_SUFFIX = ", screenshot, mouse_move, mouse_click, keyboard_type, keyboard_press, keyboard_hotkey"
+
+    PLAN_FORMAT_INSTRUCTIONS = """
 
 Format your response as a JSON array of tasks:
 [
-  {{
+  {
     "id": "task_1",
     "description": "Search documents for X",
     "tool": "document_search",
-    "tool_input": {{"query": "...", "top_k": 5}},
+    "tool_input": {"query": "...", "top_k": 5},
     "dependencies": [],
     "risk_level": "low"
-  }},
+  },
   ...
 ]
 
@@ -65,23 +81,24 @@ Risk Assessment Guidelines:
 
 Only return the JSON array, no additional text."""
 
+    def __init__(self, config: Config | None = None):
+        self.config = config or Config()
+        self.client = get_anthropic_client(self.config)
+        self.max_retries = self.config.MAX_RETRIES
+        self._valid_tools = enabled_tools(self.config.ENABLE_COMPUTER_USE)
+        self._system_prompt = self._build_system_prompt()
+        self._planning_prompt_suffix = (
+            self.PLANNING_INSTRUCTIONS
+            + (self.COMPUTER_USE_TOOLS_SUFFIX if self.config.ENABLE_COMPUTER_USE else "")
+            + self.PLAN_FORMAT_INSTRUCTIONS
+        )
+
+    def create_plan(self, state: AgentState) -> list[Task]:
+        logger.info("generating_plan", user_query=state.messages[-1].content if state.messages else "")
+        
         try:
-            response = self.client.messages.create(
-                model=self.config.ANTHROPIC_MODEL,
-                max_tokens=4096,
-                temperature=0.3,
-                system=system_prompt,
-                messages=[{"role": "user", "content": planning_prompt}]
-            )
-            
-            plan_text = response.content[0].text
-            logger.debug("raw_plan_response", plan=plan_text[:500])
-            
-            tasks = self._parse_plan(plan_text)
-            self._validate_plan(tasks)
-            
-            logger.info("plan_created", task_count=len(tasks), high_risk_tasks=sum(1 for t in tasks if t.risk_level in [RiskLevel.HIGH, RiskLevel.CRITICAL]))
-            return tasks
+            response = self.client.messages.create(**self._planning_request(state))
+            return self._plan_from_response(response)
             
         except anthropic.APIError as e:
             logger.error("anthropic_api_error", error=str(e))
@@ -93,67 +110,106 @@ Only return the JSON array, no additional text."""
             logger.error("plan_creation_failed", error=str(e))
             raise
 
-    def _parse_plan(self, plan_text: str) -> list[Task]:
-        plan_text = plan_text.strip()
-        if plan_text.startswith("```json"):
-            plan_text = plan_text[7:]
-        if plan_text.startswith("```"):
-            plan_text = plan_text[3:]
-        if plan_text.endswith("```"):
-            plan_text = plan_text[:-3]
-        plan_text = plan_text.strip()
+    def _planning_request(self, state: AgentState) -> dict[str, Any]:
+        user_query = state.messages[-1].content if state.messages else ""
+        conversation_context = state.get_conversation_context()
         
-        plan_data = json.loads(plan_text)
+        planning_prompt = f"""Analyze the user's request and create a detailed execution plan.
+
+User Request: {user_query}
+
+Conversation History:
+{conversation_context}
+
+Available Documents: {len(state.context_documents)}
+""" + self._planning_prompt_suffix
+
+        return {
+            "model": self.config.ANTHROPIC_MODEL,
+            "max_tokens": 4096,
+            "temperature": 0.3,
+            "system": self._system_prompt,
+            "messages": [{"role": "user", "content": planning_prompt}],
+        }
+
+    def _plan_from_response(self, response: Any) -> list[Task]:
+        plan_text = response.content[0].text
+        logger.debug("raw_plan_response", plan=plan_text[:500])
         
-        tasks = []
-        for item in plan_data:
-            task = Task(
-                id=item.get("id", f"task_{uuid.uuid4().hex[:8]}"),
-                description=item["description"],
-                tool=item["tool"],
-                tool_input=item["tool_input"],
-                dependencies=item.get("dependencies", []),
-                risk_level=RiskLevel(item.get("risk_level", "low")),
-                requires_approval=RiskLevel(item.get("risk_level", "low")) in [RiskLevel.HIGH, RiskLevel.CRITICAL]
-            )
-            tasks.append(task)
+        tasks = self._parse_plan(plan_text)
+        self._validate_plan(tasks)
         
+        logger.info("plan_created", task_count=len(tasks), high_risk_tasks=sum(1 for t in tasks if t.risk_level in [RiskLevel.HIGH, RiskLevel.CRITICAL]))
         return tasks
 
-    def _validate_plan(self, tasks: list[Task]) -> None:
-        task_ids = {t.id for t in tasks}
+    def _parse_plan(self, plan_text: str) -> list[Task]:
+        match = _JSON_ARRAY_RE.search(plan_text)
+        if match is None:
+            raise json.JSONDecodeError("No JSON array found in plan", plan_text, 0)
         
+        plan_data = _json_loads(match.group(0))
+        fallback_ids = _random_task_ids(sum(1 for item in plan_data if not item.get("id")))
+        return [Task(**_task_kwargs(item, fallback_ids)) for item in plan_data]
+
+    def _validate_plan(self, tasks: list[Task]) -> None:
         for task in tasks:
-            for dep_id in task.dependencies:
-                if dep_id not in task_ids:
-                    raise ValueError(f"Task {task.id} has invalid dependency: {dep_id}")
-            
-            valid_tools = ["document_search", "code_execution", "bash_command", "web_search", "file_read", "file_write"]
-            if task.tool not in valid_tools:
+            if task.tool not in self._valid_tools:
                 raise ValueError(f"Task {task.id} has invalid tool: {task.tool}")
         
-        visited = set()
-        def has_cycle(task_id: str, path: set[str]) -> bool:
-            if task_id in path:
-                return True
-            if task_id in visited:
-                return False
-            
-            visited.add(task_id)
-            path.add(task_id)
+        self._validate_dependencies({t.id: t.dependencies for t in tasks})
+
+    def _validate_dependencies(self, adj: dict[str, list[str]]) -> None:
+        # Iterative Tarjan SCC: any strongly connected component larger than one node
+        # (or a self-loop) is a cycle. Unknown dependency ids are rejected in the same pass.
+        index: dict[str, int] = {}
+        lowlink: dict[str, int] = {}
+        stack: list[str] = []
+        on_stack: set[str] = set()
+        
+        for root in adj:
+            if root in index:
+                continue
             
-            task = next((t for t in tasks if t.id == task_id), None)
-            if task:
-                for dep_id in task.dependencies:
-                    if has_cycle(dep_id, path):
-                        return True
+            index[root] = lowlink[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            frames = [(root, iter(adj[root]))]
             
-            path.remove(task_id)
-            return False
-        
-        for task in tasks:
-            if has_cycle(task.id, set()):
-                raise ValueError(f"Circular dependency detected involving task {task.id}")
+            while frames:
+                node, neighbors = frames[-1]
+                
+                for dep_id in neighbors:
+                    if dep_id not in adj:
+                        raise ValueError(f"Task {node} has invalid dependency: {dep_id}")
+                    if dep_id == node:
+                        raise ValueError(f"Circular dependency detected involving task {node}")
+                    
+                    if dep_id not in index:
+                        index[dep_id] = lowlink[dep_id] = len(index)
+                        stack.append(dep_id)
+                        on_stack.add(dep_id)
+                        frames.append((dep_id, iter(adj[dep_id])))
+                        break
+                    
+                    if dep_id in on_stack:
+                        lowlink[node] = min(lowlink[node], index[dep_id])
+                else:
+                    frames.pop()
+                    if frames:
+                        parent = frames[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[node])
+                    
+                    if lowlink[node] == index[node]:
+                        component_size = 0
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component_size += 1
+                            if member == node:
+                                break
+                        
+                        if component_size > 1:
+                            raise ValueError(f"Circular dependency detected involving task {node}")
 
     def _build_system_prompt(self) -> str:
         prompt = """You are a task planning expert for an AI agent system. Your role is to break down user requests into concrete, executable steps.
@@ -169,7 +225,7 @@ Guidelines:
 Tool Capabilities:
 - document_search: Semantic search over ingested documents (query, top_k)
 - code_execution: Run Python code in sandbox (code, timeout)
-- bash_command: Execute terminal commands (command, timeout, cwd)
+- bash_command: Execute terminal commands (command, timeout, cwd, use_shell); set use_shell to true for pipes, redirects, globs, &&, or $variables
 - web_search: Search the internet (query, num_results)
 - file_read: Read file contents (path)
 - file_write: Write to file (path, content)"""
@@ -195,6 +251,15 @@ Security:
     def refine_plan(self, state: AgentState, feedback: str) -> list[Task]:
         logger.info("refining_plan", feedback=feedback)
         
+        try:
+            response = self.client.messages.create(**self._refinement_request(state, feedback))
+            return self._refined_plan_from_response(response)
+            
+        except Exception as e:
+            logger.error("plan_refinement_failed", error=str(e))
+            raise
+
+    def _refinement_request(self, state: AgentState, feedback: str) -> dict[str, Any]:
         current_plan_json = json.dumps([{
             "id": t.id,
             "description": t.description,
@@ -212,22 +277,18 @@ Feedback: {feedback}
 
 Generate an updated plan that addresses this feedback. Return the full plan as JSON array."""
 
-        try:
-            response = self.client.messages.create(
-                model=self.config.ANTHROPIC_MODEL,
-                max_tokens=4096,
-                temperature=0.3,
-                system=self._build_system_prompt(),
-                messages=[{"role": "user", "content": refinement_prompt}]
-            )
-            
-            plan_text = response.content[0].text
-            tasks = self._parse_plan(plan_text)
-            self._validate_plan(tasks)
-            
-            logger.info("plan_refined", new_task_count=len(tasks))
-            return tasks
-            
-        except Exception as e:
-            logger.error("plan_refinement_failed", error=str(e))
-            raise
+        return {
+            "model": self.config.ANTHROPIC_MODEL,
+            "max_tokens": 4096,
+            "temperature": 0.3,
+            "system": self._system_prompt,
+            "messages": [{"role": "user", "content": refinement_prompt}],
+        }
+
+    def _refined_plan_from_response(self, response: Any) -> list[Task]:
+        plan_text = response.content[0].text
+        tasks = self._parse_plan(plan_text)
+        self._validate_plan(tasks)
+        
+        logger.info("plan_refined", new_task_count=len(tasks))
+        return tasks
@@ -1,7 +1,16 @@
+import random
+from collections import deque
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Any, Literal
 from enum import Enum
+from functools import lru_cache
+from itertools import islice
+
+@lru_cache(maxsize=1)
+def _default_max_messages() -> int:
+    from src.core.config import Config
+    return Config().MAX_CONVERSATION_MESSAGES
 
 class TaskStatus(str, Enum):
     PENDING = "pending"
@@ -16,14 +25,41 @@ class RiskLevel(str, Enum):
     HIGH = "high"
     CRITICAL = "critical"
 
-@dataclass
+    # Order by severity rather than alphabetically so max()/>= do the right thing
+    @property
+    def rank(self) -> int:
+        return _RISK_RANK[self]
+
+    def __lt__(self, other):
+        if isinstance(other, RiskLevel):
+            return _RISK_RANK[self] < _RISK_RANK[other]
+        return NotImplemented
+
+    def __le__(self, other):
+        if isinstance(other, RiskLevel):
+            return _RISK_RANK[self] <= _RISK_RANK[other]
+        return NotImplemented
+
+    def __gt__(self, other):
+        if isinstance(other, RiskLevel):
+            return _RISK_RANK[self] > _RISK_RANK[other]
+        return NotImplemented
+
+    def __ge__(self, other):
+        if isinstance(other, RiskLevel):
+            return _RISK_RANK[self] >= _RISK_RANK[other]
+        return NotImplemented
+
+_RISK_RANK = {level: rank for rank, level in enumerate(RiskLevel)}
+
+@dataclass(slots=True)
 class Message:
     role: Literal["user", "assistant", "system", "tool"]
     content: str
     timestamp: datetime = field(default_factory=datetime.utcnow)
     metadata: dict[str, Any] = field(default_factory=dict)
 
-@dataclass
+@dataclass(slots=True)
 class Task:
     id: str
     description: str
@@ -37,11 +73,25 @@ class Task:
     requires_approval: bool = False
     approved: bool = False
     retry_count: int = 0
+    prev_sleep_ms: float = 0.0
 
 @dataclass
+class RetryPolicy:
+    initial_delay_ms: float = 2000.0
+    max_delay_ms: float = 30000.0
+    multiplier: float = 3.0
+    jitter_fraction: float = 1.0
+
+    def next_delay_ms(self, prev_sleep_ms: float) -> float:
+        # Decorrelated jitter: sample between the base delay and multiplier * previous sleep.
+        # jitter_fraction narrows the window towards the upper bound (0.0 = plain exponential).
+        upper = max(self.initial_delay_ms, prev_sleep_ms * self.multiplier)
+        lower = upper - (upper - self.initial_delay_ms) * self.jitter_fraction
+        return min(self.max_delay_ms, random.uniform(lower, upper))
+
+@dataclass(slots=True)
 class AgentState:
-    messages: list[Message] = field(default_factory=list)
-    current_plan: list[Task] = field(default_factory=list)
+    messages: deque[Message] = field(default_factory=deque)
     completed_tasks: list[Task] = field(default_factory=list)
     context_documents: list[dict[str, Any]] = field(default_factory=list)
     tool_outputs: dict[str, Any] = field(default_factory=dict)
@@ -50,52 +100,96 @@ class AgentState:
     user_id: str = "default"
     iteration_count: int = 0
     max_iterations: int = 10
+    max_context_messages: int = field(default_factory=_default_max_messages)
+    message_count: int = 0
     is_complete: bool = False
     error: str | None = None
     guardrail_violations: list[dict[str, Any]] = field(default_factory=list)
     metadata: dict[str, Any] = field(default_factory=dict)
+    _plan: dict[str, Task] = field(default_factory=dict, init=False, repr=False)
+    _completed_ids: set[str] = field(default_factory=set, init=False, repr=False)
+    _finished_ids: set[str] = field(default_factory=set, init=False, repr=False)
+    _context_cache: str | None = field(default=None, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        # Keep twice the context window so callers asking for a wider window still get history.
+        self.messages = deque(self.messages, maxlen=self.max_context_messages * 2)
+        self.message_count = max(self.message_count, len(self.messages))
+        self._completed_ids.update(t.id for t in self.completed_tasks)
 
     def add_message(self, role: Literal["user", "assistant", "system", "tool"], content: str, metadata: dict[str, Any] | None = None) -> None:
         msg = Message(role=role, content=content, metadata=metadata or {})
         self.messages.append(msg)
+        self.message_count += 1
+        self._context_cache = None
+
+    # Tasks are keyed by id in plan order, so lookups and removal are O(1) and removal
+    # never reorders the steps get_next_task and refine_plan walk through
+    @property
+    def current_plan(self) -> list[Task]:
+        return list(self._plan.values())
 
     def get_pending_tasks(self) -> list[Task]:
-        return [t for t in self.current_plan if t.status == TaskStatus.PENDING and not t.dependencies]
+        return [t for t in self._plan.values() if t.status == TaskStatus.PENDING and not t.dependencies]
+
+    def set_plan(self, tasks: list[Task]) -> None:
+        self._plan = {t.id: t for t in tasks}
+        self._finished_ids = {t.id for t in self._plan.values() if t.status in (TaskStatus.COMPLETED, TaskStatus.FAILED)}
+
+    def add_task(self, task: Task) -> None:
+        self._plan[task.id] = task
+        if task.status in (TaskStatus.COMPLETED, TaskStatus.FAILED):
+            self._finished_ids.add(task.id)
+
+    def get_task(self, task_id: str) -> Task | None:
+        return self._plan.get(task_id)
+
+    def is_task_completed(self, task_id: str) -> bool:
+        return task_id in self._completed_ids
+
+    def remove_task(self, task_id: str) -> Task | None:
+        task = self._plan.pop(task_id, None)
+        if task is not None:
+            self._finished_ids.discard(task_id)
+        return task
 
     def get_next_task(self) -> Task | None:
-        completed_ids = {t.id for t in self.completed_tasks}
-        for task in self.current_plan:
+        for task in self._plan.values():
             if task.status == TaskStatus.PENDING:
-                deps_met = all(dep_id in completed_ids for dep_id in task.dependencies)
-                if deps_met:
+                if all(dep_id in self._completed_ids for dep_id in task.dependencies):
                     return task
         return None
 
     def mark_task_complete(self, task_id: str, result: Any) -> None:
-        for task in self.current_plan:
-            if task.id == task_id:
-                task.status = TaskStatus.COMPLETED
-                task.result = result
-                self.completed_tasks.append(task)
-                self.current_plan.remove(task)
-                break
+        task = self.remove_task(task_id)
+        if task is not None:
+            task.status = TaskStatus.COMPLETED
+            task.result = result
+            self.completed_tasks.append(task)
+            self._completed_ids.add(task_id)
 
     def mark_task_failed(self, task_id: str, error: str) -> None:
-        for task in self.current_plan:
-            if task.id == task_id:
-                task.status = TaskStatus.FAILED
-                task.error = error
-                break
+        task = self._plan.get(task_id)
+        if task is not None:
+            task.status = TaskStatus.FAILED
+            task.error = error
+            self._finished_ids.add(task_id)
 
     def is_planning_complete(self) -> bool:
-        return len(self.current_plan) == 0 or all(t.status in [TaskStatus.COMPLETED, TaskStatus.FAILED] for t in self.current_plan)
+        # Completed tasks leave the plan, so only failed ones are tracked as finished
+        return len(self._finished_ids) == len(self._plan)
 
     def get_conversation_context(self, max_messages: int | None = None) -> str:
         if max_messages is None:
-            from src.core.config import Config
-            max_messages = Config().MAX_CONVERSATION_MESSAGES
-        recent = self.messages[-max_messages:]
-        return "\n".join([f"{msg.role}: {msg.content}" for msg in recent])
+            if self._context_cache is None:
+                self._context_cache = self._render_context(self.max_context_messages)
+            return self._context_cache
+        return self._render_context(max_messages)
+
+    def _render_context(self, max_messages: int) -> str:
+        recent = list(islice(reversed(self.messages), max_messages))
+        recent.reverse()
+        return "\n".join(f"{msg.role}: {msg.content}" for msg in recent)
 
     def should_continue(self) -> bool:
         return not self.is_complete and self.iteration_count < self.max_iterations and self.error is None
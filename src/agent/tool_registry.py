@@ -0,0 +1,104 @@
+from dataclasses import dataclass, field
+from operator import attrgetter
+from types import MappingProxyType
+from typing import Any, Callable, Mapping
+from src.agent.state import RiskLevel
+
+@dataclass(frozen=True, slots=True)
+class ToolSpec:
+    name: str
+    getter: Callable[[Any], Callable[..., Any]]
+    required: tuple[str, ...] = ()
+    default_risk: RiskLevel = RiskLevel.LOW
+    computer_use: bool = False
+    description: str = ""
+    parameters: Mapping[str, Mapping[str, Any]] = field(default_factory=lambda: MappingProxyType({}), compare=False)
+
+    @property
+    def schema(self) -> Mapping[str, Any]:
+        return MappingProxyType({"name": self.name, "description": self.description, "parameters": self.parameters})
+
+def _param(type_: str, description: str, required: bool = False, **extra: Any) -> Mapping[str, Any]:
+    return MappingProxyType({"type": type_, "required": required, **extra, "description": description})
+
+def _spec(
+    name: str,
+    description: str,
+    parameters: dict[str, Mapping[str, Any]],
+    default_risk: RiskLevel = RiskLevel.LOW,
+    computer_use: bool = False,
+) -> ToolSpec:
+    # Required fields come from the parameter schema so the two cannot drift
+    required = tuple(key for key, param in parameters.items() if param["required"])
+    return ToolSpec(name, attrgetter(name), required, default_risk, computer_use, description, MappingProxyType(parameters))
+
+# Single tool catalog shared by the planner, executor, auditor and AgentTools.get_available_tools.
+# getter resolves the bound method on an AgentTools instance; schemas are read-only views.
+TOOL_SPECS: Mapping[str, ToolSpec] = MappingProxyType({spec.name: spec for spec in (
+    _spec("document_search", "Semantic search over ingested documents", {
+        "query": _param("string", "Search query", required=True),
+        "top_k": _param("integer", "Number of results", default=5),
+        "filter_metadata": _param("object", "Metadata filters"),
+    }),
+    _spec("code_execution", "Execute Python code in sandboxed environment", {
+        "code": _param("string", "Python code to execute", required=True),
+        "timeout": _param("integer", "Timeout in seconds", default=30),
+    }, RiskLevel.HIGH),
+    _spec("bash_command", "Execute bash/shell commands in terminal", {
+        "command": _param("string", "Bash command to execute", required=True),
+        "timeout": _param("integer", "Timeout in seconds", default=30),
+        "cwd": _param("string", "Working directory"),
+        "use_shell": _param("boolean", "Run through /bin/sh for pipes, redirects and globs", default=False),
+    }, RiskLevel.MEDIUM),
+    _spec("web_search", "Search the internet for information", {
+        "query": _param("string", "Search query", required=True),
+        "num_results": _param("integer", "Number of results", default=5),
+    }, RiskLevel.MEDIUM),
+    _spec("file_read", "Read contents of a file", {
+        "path": _param("string", "Relative file path", required=True),
+        "encoding": _param("string", "File encoding", default="utf-8"),
+        "offset": _param("integer", "Byte offset to start reading from", default=0),
+        "length": _param("integer", "Maximum number of bytes to read"),
+    }),
+    _spec("file_write", "Write content to a file", {
+        "path": _param("string", "Relative file path", required=True),
+        "content": _param("string", "Content to write", required=True),
+        "encoding": _param("string", "File encoding", default="utf-8"),
+        "create_dirs": _param("boolean", "Create parent directories", default=True),
+    }, RiskLevel.MEDIUM),
+    _spec("screenshot", "Capture screenshot of entire screen or specific region", {
+        "region": _param("object", "Region to capture (x, y, width, height)"),
+        "save_path": _param("string", "Path to save screenshot"),
+        "return_base64": _param("boolean", "Return base64 encoded image", default=False),
+    }, computer_use=True),
+    _spec("mouse_move", "Move mouse cursor to specific coordinates", {
+        "x": _param("integer", "X coordinate", required=True),
+        "y": _param("integer", "Y coordinate", required=True),
+        "duration": _param("number", "Movement duration in seconds"),
+    }, RiskLevel.MEDIUM, computer_use=True),
+    _spec("mouse_click", "Click mouse at specific coordinates", {
+        "x": _param("integer", "X coordinate (current position if not specified)"),
+        "y": _param("integer", "Y coordinate (current position if not specified)"),
+        "button": _param("string", "Mouse button: left, right, middle", default="left"),
+        "clicks": _param("integer", "Number of clicks", default=1),
+    }, RiskLevel.MEDIUM, computer_use=True),
+    _spec("keyboard_type", "Type text using keyboard", {
+        "text": _param("string", "Text to type", required=True),
+        "interval": _param("number", "Interval between keystrokes in seconds"),
+    }, RiskLevel.MEDIUM, computer_use=True),
+    _spec("keyboard_press", "Press a specific keyboard key", {
+        "key": _param("string", "Key to press (e.g., 'enter', 'tab', 'esc')", required=True),
+        "presses": _param("integer", "Number of times to press", default=1),
+    }, RiskLevel.MEDIUM, computer_use=True),
+    _spec("keyboard_hotkey", "Press keyboard hotkey combination", {
+        "keys": _param("array", "Keys to press together (e.g., ['ctrl', 'c'])", required=True),
+    }, RiskLevel.MEDIUM, computer_use=True),
+)})
+
+COMPUTER_USE_TOOLS = frozenset(name for name, spec in TOOL_SPECS.items() if spec.computer_use)
+
+def enabled_tools(computer_use: bool) -> frozenset[str]:
+    return frozenset(name for name, spec in TOOL_SPECS.items() if computer_use or not spec.computer_use)
+
+def tool_schemas(computer_use: bool) -> tuple[Mapping[str, Any], ...]:
+    return tuple(spec.schema for spec in TOOL_SPECS.values() if computer_use or not spec.computer_use)
@@ -1,46 +1,145 @@
+import hashlib
+import json
+import mmap
 import os
+import re
+import shlex
+import stat
 import subprocess
-import tempfile
 from pathlib import Path
-from typing import Any
+from typing import Any, Mapping
 import requests
+from src.agent.tool_registry import tool_schemas
 from src.core.config import Config
 from src.core.logging_setup import get_logger
 from src.memory.vector_store import VectorStore
 from src.memory.embeddings import EmbeddingService
+from src.memory.query_cache import DISKCACHE_AVAILABLE, PersistentQueryCache, QueryCache
 from src.tools.sandbox import DockerSandbox
 from src.tools.code_analyzer import CodeAnalyzer
 from src.tools.output_sanitizer import OutputSanitizer
 from src.tools.computer_use import ComputerUseTools
+from src.tools.interpreter_pool import InterpreterPool
+from src.tools.pattern_matcher import PatternMatcher
 
 logger = get_logger(__name__)
 
+DANGEROUS_CODE_PATTERNS = [
+    "os.system",
+    "subprocess.call",
+    "subprocess.Popen",
+    "eval(",
+    "exec(",
+    "__import__",
+    "compile(",
+    "open(",
+    "file(",
+]
+
+DANGEROUS_COMMAND_PATTERNS = [
+    "rm -rf /",
+    "rm -rf ~",
+    "dd if=",
+    "mkfs",
+    "format",
+    "> /dev/sda",
+    "fork bomb",
+    ":(){ :|:& };:",
+    "chmod -R 777 /",
+    "curl",
+    "wget",
+]
+
+# One case-insensitive scan per list: no per-pattern loop, no lowercased copy
+_DANGEROUS_CODE_MATCHER = PatternMatcher(DANGEROUS_CODE_PATTERNS)
+_DANGEROUS_COMMAND_MATCHER = PatternMatcher(DANGEROUS_COMMAND_PATTERNS)
+
+# Unquoted shell syntax that a direct exec would pass through as literal arguments
+_SHELL_OPERATOR_CHARS = frozenset("();<>|&")
+_SHELL_EXPANSION_CHARS = frozenset("*?[$`")
+_QUOTED_RE = re.compile(r"'[^']*'|\"(?:[^\"\\]|\\.)*\"|\\.")
+
+
+def _shell_syntax(command: str) -> str | None:
+    lexer = shlex.shlex(command, posix=False, punctuation_chars=True)
+    lexer.whitespace_split = True
+    try:
+        for token in lexer:
+            unquoted = _QUOTED_RE.sub("", token)
+            if unquoted and (set(unquoted) <= _SHELL_OPERATOR_CHARS or unquoted.startswith("~")
+                             or not _SHELL_EXPANSION_CHARS.isdisjoint(unquoted)):
+                return token
+    except ValueError:
+        return None  # unbalanced quotes; shlex.split reports these
+    return None
+
+
 class AgentTools:
     def __init__(self, config: Config | None = None):
         self.config = config or Config()
-        self.vector_store = VectorStore()
         self.embedding_service = EmbeddingService()
+        self.vector_store = VectorStore(embedding_service=self.embedding_service)
+        self.query_cache = QueryCache(
+            max_entries=self.config.QUERY_CACHE_MAX_ENTRIES,
+            ttl_seconds=self.config.QUERY_CACHE_TTL_SECONDS,
+        )
+        self.vector_store.add_write_listener(self.query_cache.invalidate)
+        self.disk_cache = None
+        if self.config.QUERY_DISK_CACHE_DIR and DISKCACHE_AVAILABLE:
+            self.disk_cache = PersistentQueryCache(
+                self.config.QUERY_DISK_CACHE_DIR,
+                ttl_seconds=self.config.QUERY_DISK_CACHE_TTL_SECONDS,
+            )
+            # Keys carry the corpus version; clearing also drops entries a recreated table could collide with
+            self.vector_store.add_write_listener(self.disk_cache.clear)
         self.code_timeout = self.config.CODE_EXECUTION_TIMEOUT
+        # Snapshot the working directory and child environment once per session
+        self._cwd = os.getcwd()
+        self.workspace_root = Path(self._cwd).resolve()
+        self._code_env = {**os.environ, 'PYTHONPATH': self._cwd}
         self.sandbox = DockerSandbox(config=self.config) if self.config.ENABLE_DOCKER_SANDBOX else None
         self.code_analyzer = CodeAnalyzer() if self.config.ENABLE_CODE_ANALYZER else None
         self.output_sanitizer = OutputSanitizer() if self.config.ENABLE_OUTPUT_SANITIZER else None
         self.computer_use = ComputerUseTools(config=self.config) if self.config.ENABLE_COMPUTER_USE else None
+        self._available_tools = tool_schemas(self.computer_use is not None)
+        self.interpreter_pool = None
+        if self.config.CODE_INTERPRETER_POOL_SIZE > 0:
+            self.interpreter_pool = InterpreterPool(
+                self.config.CODE_INTERPRETER_POOL_SIZE,
+                env=self._code_env,
+            )
 
     def document_search(self, query: str, top_k: int = 5, filter_metadata: dict[str, Any] | None = None) -> list[dict[str, Any]]:
         logger.info("document_search", query=query[:100], top_k=top_k)
         
+        cache_key = self._search_cache_key(query, top_k, filter_metadata)
+        if cache_key is not None:
+            cached = self.query_cache.get(cache_key)
+            if cached is not None:
+                logger.info("document_search_cache_hit", result_count=len(cached))
+                return [dict(result) for result in cached]
+        
+        use_disk_cache = cache_key is not None and self.disk_cache is not None
+        disk_key = self._persistent_cache_key(cache_key, self.vector_store.corpus_version()) if use_disk_cache else None
+        if disk_key is not None:
+            cached = self.disk_cache.get(disk_key)
+            if cached is not None:
+                logger.info("document_search_disk_cache_hit", result_count=len(cached))
+                self.query_cache.put(cache_key, cached)
+                return [dict(result) for result in cached]
+        
         try:
-            query_embedding = self.embedding_service.embed_text(query)
-            results = self.vector_store.search(query_embedding=query_embedding, top_k=top_k, filter_metadata=filter_metadata)
+            # VectorStore memoizes the query embedding, so result-cache misses on a repeated query skip the model
+            results, version = self.vector_store.search_with_version(query, limit=top_k, filter_metadata=filter_metadata)
+            
+            formatted_results = [self._format_search_result(result) for result in results]
             
-            formatted_results = []
-            for result in results:
-                formatted_results.append({
-                    "id": result.get("id"),
-                    "text": result.get("text"),
-                    "score": result.get("score"),
-                    "metadata": result.get("metadata", {}),
-                })
+            if cache_key is not None:
+                self.query_cache.put(cache_key, [dict(result) for result in formatted_results])
+            # Stored under the version the search actually read, which may be newer than the lookup's
+            disk_key = self._persistent_cache_key(cache_key, version) if use_disk_cache else None
+            if disk_key is not None:
+                self.disk_cache.put(disk_key, formatted_results)
             
             logger.info("document_search_complete", result_count=len(formatted_results))
             return formatted_results
@@ -49,6 +148,63 @@ class AgentTools:
             logger.error("document_search_failed", error=str(e))
             raise
 
+    def document_search_batch(self, queries: list[str], top_k: int = 5) -> list[list[dict[str, Any]]]:
+        logger.info("document_search_batch", query_count=len(queries), top_k=top_k)
+        
+        results: list[list[dict[str, Any]] | None] = [None] * len(queries)
+        misses: dict[str, list[int]] = {}
+        for i, query in enumerate(queries):
+            cached = self.query_cache.get(self._search_cache_key(query, top_k, None))
+            if cached is not None:
+                results[i] = [dict(result) for result in cached]
+            else:
+                misses.setdefault(query, []).append(i)
+        
+        if misses:
+            try:
+                # Only cache misses are embedded, in one forward pass and one corpus scan
+                miss_queries = list(misses)
+                embeddings = self.embedding_service.embed_texts(miss_queries)
+                batch_results = self.vector_store.search_batch(embeddings, limit=top_k)
+            except Exception as e:
+                logger.error("document_search_batch_failed", error=str(e))
+                raise
+            
+            for query, query_results in zip(miss_queries, batch_results):
+                formatted_results = [self._format_search_result(result) for result in query_results]
+                self.query_cache.put(self._search_cache_key(query, top_k, None), [dict(result) for result in formatted_results])
+                for i in misses[query]:
+                    results[i] = [dict(result) for result in formatted_results]
+        
+        logger.info("document_search_batch_complete", query_count=len(queries), cache_misses=len(misses))
+        return results
+
+    @staticmethod
+    def _format_search_result(result: dict[str, Any]) -> dict[str, Any]:
+        return {
+            "id": result.get("id"),
+            "text": result.get("text"),
+            "score": result.get("score"),
+            "metadata": result.get("metadata", {}),
+        }
+
+    @staticmethod
+    def _search_cache_key(query: str, top_k: int, filter_metadata: dict[str, Any] | None) -> tuple | None:
+        try:
+            filters = frozenset((filter_metadata or {}).items())
+        except TypeError:
+            # Unhashable filter values (lists, nested dicts) bypass the cache
+            return None
+        return hashlib.sha1(query.encode("utf-8")).hexdigest(), top_k, filters
+
+    @staticmethod
+    def _persistent_cache_key(cache_key: tuple, version: int | None) -> str | None:
+        if version is None:
+            return None
+        query_hash, top_k, filters = cache_key
+        # Frozenset iteration order differs between processes, so serialize sorted items
+        return f"{query_hash}:{top_k}:{json.dumps(sorted(filters), default=str)}:{version}"
+
     def code_execution(self, code: str, timeout: int | None = None) -> dict[str, Any]:
         logger.info("code_execution", code_length=len(code), timeout=timeout or self.code_timeout)
         
@@ -76,39 +232,51 @@ class AgentTools:
         
         logger.info("code_execution_complete", exit_code=output.get("exit_code"), sandboxed=output.get("sandboxed", False))
         return output
-    
+
     def _execute_code_subprocess(self, code: str, timeout: int) -> dict[str, Any]:
         if not self._is_code_safe(code):
             logger.error("unsafe_code_detected", code=code[:200])
             raise ValueError("Code contains potentially dangerous operations")
         
+        if self.interpreter_pool is not None:
+            try:
+                result = self.interpreter_pool.execute(code, timeout)
+            except TimeoutError:
+                logger.error("code_execution_timeout", timeout=timeout)
+                raise
+            except Exception as e:
+                logger.error("code_execution_failed", error=str(e))
+                raise
+            
+            return {
+                "stdout": result["stdout"],
+                "stderr": result["stderr"],
+                "exit_code": result["exit_code"],
+                "success": result["exit_code"] == 0,
+                "sandboxed": False,
+            }
+        
         try:
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as f:
-                f.write(code)
-                temp_file = f.name
+            # The interpreter reads the program from stdin: no temp file to write or unlink
+            result = subprocess.run(
+                ['python', '-'],
+                input=code,
+                capture_output=True,
+                text=True,
+                timeout=timeout,
+                env=self._code_env
+            )
+            
+            output = {
+                "stdout": result.stdout,
+                "stderr": result.stderr,
+                "exit_code": result.returncode,
+                "success": result.returncode == 0,
+                "sandboxed": False,
+            }
+            
+            return output
             
-            try:
-                result = subprocess.run(
-                    ['python', temp_file],
-                    capture_output=True,
-                    text=True,
-                    timeout=timeout,
-                    env={**os.environ, 'PYTHONPATH': os.getcwd()}
-                )
-                
-                output = {
-                    "stdout": result.stdout,
-                    "stderr": result.stderr,
-                    "exit_code": result.returncode,
-                    "success": result.returncode == 0,
-                    "sandboxed": False,
-                }
-                
-                return output
-                
-            finally:
-                os.unlink(temp_file)
-                
         except subprocess.TimeoutExpired:
             logger.error("code_execution_timeout", timeout=timeout)
             raise TimeoutError(f"Code execution timed out after {timeout} seconds")
@@ -117,23 +285,10 @@ class AgentTools:
             raise
 
     def _is_code_safe(self, code: str) -> bool:
-        dangerous_patterns = [
-            "os.system",
-            "subprocess.call",
-            "subprocess.Popen",
-            "eval(",
-            "exec(",
-            "__import__",
-            "compile(",
-            "open(",
-            "file(",
-        ]
-        
-        code_lower = code.lower()
-        for pattern in dangerous_patterns:
-            if pattern.lower() in code_lower:
-                logger.warning("dangerous_pattern_detected", pattern=pattern)
-                return False
+        pattern = _DANGEROUS_CODE_MATCHER.search(code)
+        if pattern:
+            logger.warning("dangerous_pattern_detected", pattern=pattern)
+            return False
         
         return True
 
@@ -147,8 +302,14 @@ class AgentTools:
             "snippet": "Web search functionality requires API key configuration (e.g., Google Custom Search, Bing API)",
         }]
 
-    def bash_command(self, command: str, timeout: int | None = None, cwd: str | None = None) -> dict[str, Any]:
-        logger.info("bash_command", command=command[:100], timeout=timeout, cwd=cwd)
+    def bash_command(
+        self,
+        command: str,
+        timeout: int | None = None,
+        cwd: str | None = None,
+        use_shell: bool = False,
+    ) -> dict[str, Any]:
+        logger.info("bash_command", command=command[:100], timeout=timeout, cwd=cwd, use_shell=use_shell)
         
         if not self._is_command_safe(command):
             logger.error("unsafe_command_detected", command=command[:200])
@@ -166,26 +327,40 @@ class AgentTools:
                 raise
         else:
             logger.warning("sandbox_not_available_using_subprocess")
-            output = self._execute_bash_subprocess(command, timeout, cwd)
+            output = self._execute_bash_subprocess(command, timeout, cwd, use_shell)
         
         if self.output_sanitizer:
             output = self.output_sanitizer.sanitize_execution_output(output)
         
         logger.info("bash_command_complete", exit_code=output.get("exit_code"), sandboxed=output.get("sandboxed", False))
         return output
+
+    @staticmethod
+    def _split_command(command: str) -> list[str]:
+        syntax = _shell_syntax(command)
+        if syntax is not None:
+            raise ValueError(f"Command uses shell syntax ({syntax!r}); set use_shell=true to run it through /bin/sh")
+        try:
+            argv = shlex.split(command)
+        except ValueError as e:
+            raise ValueError(f"Invalid command syntax: {e}")
+        if not argv:
+            raise ValueError("Empty command")
+        return argv
     
-    def _execute_bash_subprocess(self, command: str, timeout: int, cwd: str | None) -> dict[str, Any]:
-        working_dir = cwd or os.getcwd()
+    def _execute_bash_subprocess(self, command: str, timeout: int, cwd: str | None, use_shell: bool = False) -> dict[str, Any]:
+        working_dir = cwd or self._cwd
         
         try:
+            # Without use_shell the command is exec'd directly: no /bin/sh fork and no
+            # shell metacharacter interpretation. The child inherits os.environ as is.
             result = subprocess.run(
-                command,
-                shell=True,
+                command if use_shell else self._split_command(command),
+                shell=use_shell,
                 capture_output=True,
                 text=True,
                 timeout=timeout,
                 cwd=working_dir,
-                env={**os.environ}
             )
             
             output = {
@@ -207,50 +382,71 @@ class AgentTools:
             raise
 
     def _is_command_safe(self, command: str) -> bool:
-        dangerous_commands = [
-            "rm -rf /",
-            "rm -rf ~",
-            "dd if=",
-            "mkfs",
-            "format",
-            "> /dev/sda",
-            "fork bomb",
-            ":(){ :|:& };:",
-            "chmod -R 777 /",
-            "curl", 
-            "wget",
-        ]
-        
-        command_lower = command.lower()
-        for danger in dangerous_commands:
-            if danger.lower() in command_lower:
-                logger.warning("dangerous_command_detected", pattern=danger)
-                return False
+        pattern = _DANGEROUS_COMMAND_MATCHER.search(command)
+        if pattern:
+            logger.warning("dangerous_command_detected", pattern=pattern)
+            return False
         
         return True
 
-    def file_read(self, path: str, encoding: str = "utf-8") -> dict[str, Any]:
-        logger.info("file_read", path=path)
+    def file_read(
+        self,
+        path: str,
+        encoding: str = "utf-8",
+        as_bytes: bool = False,
+        offset: int = 0,
+        length: int | None = None,
+    ) -> dict[str, Any]:
+        logger.info("file_read", path=path, offset=offset, length=length)
+        
+        if offset < 0 or (length is not None and length < 0):
+            raise ValueError("offset and length must be non-negative")
         
         safe_path = self._sanitize_path(path)
         
         try:
-            file_path = Path(safe_path)
-            
-            if not file_path.exists():
+            try:
+                # O_NONBLOCK keeps a FIFO from blocking the open before the S_ISREG check;
+                # it has no effect on regular files
+                fd = os.open(safe_path, os.O_RDONLY | os.O_NONBLOCK)
+            except FileNotFoundError:
                 raise FileNotFoundError(f"File not found: {safe_path}")
             
-            if not file_path.is_file():
-                raise ValueError(f"Path is not a file: {safe_path}")
-            
-            max_size_bytes = self.config.MAX_FILE_READ_SIZE_MB * 1024 * 1024
-            if file_path.stat().st_size > max_size_bytes:
-                raise ValueError(f"File too large (>{self.config.MAX_FILE_READ_SIZE_MB}MB): {safe_path}")
-            
-            content = file_path.read_text(encoding=encoding)
+            try:
+                # Validate and read through the same descriptor: one fstat, no stat/open race
+                st = os.fstat(fd)
+                if not stat.S_ISREG(st.st_mode):
+                    raise ValueError(f"Path is not a file: {safe_path}")
+                
+                partial = as_bytes or offset > 0 or length is not None
+                start = min(offset, st.st_size)
+                end = st.st_size if length is None else min(st.st_size, start + length)
+                
+                # The limit applies to what is materialized, so slices of larger files are allowed
+                max_size_bytes = self.config.MAX_FILE_READ_SIZE_MB * 1024 * 1024
+                if end - start > max_size_bytes:
+                    raise ValueError(f"File too large (>{self.config.MAX_FILE_READ_SIZE_MB}MB): {safe_path}")
+                
+                if partial:
+                    content = self._read_slice(fd, start, end)
+                    if not as_bytes:
+                        # Slice boundaries may split a multi-byte character
+                        content = content.decode(encoding, errors="replace")
+                else:
+                    buf = bytearray(st.st_size)
+                    view = memoryview(buf)
+                    read = 0
+                    while read < st.st_size:
+                        n = os.readv(fd, [view[read:]])
+                        if n == 0:
+                            break
+                        read += n
+                    content = str(view[:read], encoding)
+            finally:
+                os.close(fd)
             
             result = {
-                "path": str(file_path),
+                "path": safe_path,
                 "content": content,
                 "size": len(content),
                 "encoding": encoding,
@@ -263,21 +459,34 @@ class AgentTools:
             logger.error("file_read_failed", path=safe_path, error=str(e))
             raise
 
+    @staticmethod
+    def _read_slice(fd: int, start: int, end: int) -> bytes:
+        if start >= end:
+            return b""
+        # Map the file and copy out only the requested range
+        with mmap.mmap(fd, 0, prot=mmap.PROT_READ) as mapped:
+            return mapped[start:end]
+
     def file_write(self, path: str, content: str, encoding: str = "utf-8", create_dirs: bool = True) -> dict[str, Any]:
         logger.info("file_write", path=path, content_length=len(content))
         
         safe_path = self._sanitize_path(path)
         
         try:
-            file_path = Path(safe_path)
-            
             if create_dirs:
-                file_path.parent.mkdir(parents=True, exist_ok=True)
+                os.makedirs(os.path.dirname(safe_path), exist_ok=True)
             
-            file_path.write_text(content, encoding=encoding)
+            data = memoryview(content.encode(encoding))
+            fd = os.open(safe_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                written = 0
+                while written < len(data):
+                    written += os.write(fd, data[written:])
+            finally:
+                os.close(fd)
             
             result = {
-                "path": str(file_path),
+                "path": safe_path,
                 "size": len(content),
                 "encoding": encoding,
                 "success": True,
@@ -293,20 +502,17 @@ class AgentTools:
     def _sanitize_path(self, path: str) -> str:
         path = path.strip()
         
-        if ".." in path:
-            raise ValueError("Path traversal detected")
-        
         if path.startswith("/"):
             raise ValueError("Absolute paths not allowed")
         
-        workspace_root = os.getcwd()
-        safe_path = os.path.join(workspace_root, path)
-        safe_path = os.path.normpath(safe_path)
-        
-        if not safe_path.startswith(workspace_root):
-            raise ValueError("Path outside workspace")
+        # resolve() collapses ".." and follows symlinks, so escapes of either kind fail relative_to
+        candidate = (self.workspace_root / path).resolve()
+        try:
+            candidate.relative_to(self.workspace_root)
+        except ValueError:
+            raise ValueError("Path traversal detected: path resolves outside workspace")
         
-        return safe_path
+        return str(candidate)
 
     def screenshot(self, region: dict | None = None, save_path: str | None = None, return_base64: bool = False) -> dict[str, Any]:
         if not self.computer_use:
@@ -386,115 +592,6 @@ class AgentTools:
             logger.error("keyboard_hotkey_failed", error=str(e))
             raise
 
-    def get_available_tools(self) -> list[dict[str, Any]]:
-        tools = [
-            {
-                "name": "document_search",
-                "description": "Semantic search over ingested documents",
-                "parameters": {
-                    "query": {"type": "string", "required": True, "description": "Search query"},
-                    "top_k": {"type": "integer", "required": False, "default": 5, "description": "Number of results"},
-                    "filter_metadata": {"type": "object", "required": False, "description": "Metadata filters"},
-                }
-            },
-            {
-                "name": "code_execution",
-                "description": "Execute Python code in sandboxed environment",
-                "parameters": {
-                    "code": {"type": "string", "required": True, "description": "Python code to execute"},
-                    "timeout": {"type": "integer", "required": False, "default": 30, "description": "Timeout in seconds"},
-                }
-            },
-            {
-                "name": "bash_command",
-                "description": "Execute bash/shell commands in terminal",
-                "parameters": {
-                    "command": {"type": "string", "required": True, "description": "Bash command to execute"},
-                    "timeout": {"type": "integer", "required": False, "default": 30, "description": "Timeout in seconds"},
-                    "cwd": {"type": "string", "required": False, "description": "Working directory"},
-                }
-            },
-            {
-                "name": "web_search",
-                "description": "Search the internet for information",
-                "parameters": {
-                    "query": {"type": "string", "required": True, "description": "Search query"},
-                    "num_results": {"type": "integer", "required": False, "default": 5, "description": "Number of results"},
-                }
-            },
-            {
-                "name": "file_read",
-                "description": "Read contents of a file",
-                "parameters": {
-                    "path": {"type": "string", "required": True, "description": "Relative file path"},
-                    "encoding": {"type": "string", "required": False, "default": "utf-8", "description": "File encoding"},
-                }
-            },
-            {
-                "name": "file_write",
-                "description": "Write content to a file",
-                "parameters": {
-                    "path": {"type": "string", "required": True, "description": "Relative file path"},
-                    "content": {"type": "string", "required": True, "description": "Content to write"},
-                    "encoding": {"type": "string", "required": False, "default": "utf-8", "description": "File encoding"},
-                    "create_dirs": {"type": "boolean", "required": False, "default": True, "description": "Create parent directories"},
-                }
-            },
-        ]
-        
-        if self.computer_use:
-            tools.extend([
-                {
-                    "name": "screenshot",
-                    "description": "Capture screenshot of entire screen or specific region",
-                    "parameters": {
-                        "region": {"type": "object", "required": False, "description": "Region to capture (x, y, width, height)"},
-                        "save_path": {"type": "string", "required": False, "description": "Path to save screenshot"},
-                        "return_base64": {"type": "boolean", "required": False, "default": False, "description": "Return base64 encoded image"},
-                    }
-                },
-                {
-                    "name": "mouse_move",
-                    "description": "Move mouse cursor to specific coordinates",
-                    "parameters": {
-                        "x": {"type": "integer", "required": True, "description": "X coordinate"},
-                        "y": {"type": "integer", "required": True, "description": "Y coordinate"},
-                        "duration": {"type": "number", "required": False, "description": "Movement duration in seconds"},
-                    }
-                },
-                {
-                    "name": "mouse_click",
-                    "description": "Click mouse at specific coordinates",
-                    "parameters": {
-                        "x": {"type": "integer", "required": False, "description": "X coordinate (current position if not specified)"},
-                        "y": {"type": "integer", "required": False, "description": "Y coordinate (current position if not specified)"},
-                        "button": {"type": "string", "required": False, "default": "left", "description": "Mouse button: left, right, middle"},
-                        "clicks": {"type": "integer", "required": False, "default": 1, "description": "Number of clicks"},
-                    }
-                },
-                {
-                    "name": "keyboard_type",
-                    "description": "Type text using keyboard",
-                    "parameters": {
-                        "text": {"type": "string", "required": True, "description": "Text to type"},
-                        "interval": {"type": "number", "required": False, "description": "Interval between keystrokes in seconds"},
-                    }
-                },
-                {
-                    "name": "keyboard_press",
-                    "description": "Press a specific keyboard key",
-                    "parameters": {
-                        "key": {"type": "string", "required": True, "description": "Key to press (e.g., 'enter', 'tab', 'esc')"},
-                        "presses": {"type": "integer", "required": False, "default": 1, "description": "Number of times to press"},
-                    }
-                },
-                {
-                    "name": "keyboard_hotkey",
-                    "description": "Press keyboard hotkey combination",
-                    "parameters": {
-                        "keys": {"type": "array", "required": True, "description": "Keys to press together (e.g., ['ctrl', 'c'])"},
-                    }
-                },
-            ])
-        
-        return tools
+    def get_available_tools(self) -> list[Mapping[str, Any]]:
+        # The schemas are read-only views shared by every instance
+        return list(self._available_tools)
@@ -1,17 +1,61 @@
+import atexit
 import json
+import math
+import mmap
+import os
+import queue
+import random
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import chain
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
 
 import boto3
+import requests
+from requests.adapters import HTTPAdapter
+from boto3.s3.transfer import TransferConfig
 from botocore.exceptions import ClientError, NoCredentialsError
 from botocore.config import Config as BotoConfig
 
-from src.core.config import get_config
+from src.core.config import Config, get_config
 from src.core.logging_setup import get_logger
 
 logger = get_logger(__name__)
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+    
+    def _json_dumps(value: Any) -> str:
+        # Secrets Manager takes SecretString as str
+        return orjson.dumps(value).decode()
+except ImportError:
+    _json_loads = json.loads
+    _json_dumps = json.dumps
+
+_FLUSH_INTERVAL_SECONDS = 0.2
+_MAX_BATCH_EVENTS = 10_000
+_MAX_BATCH_BYTES = 1_048_576
+_EVENT_OVERHEAD_BYTES = 26
+
+
+def _boto_config(config: Config) -> BotoConfig:
+    # urllib3 keeps only 10 connections by default; threaded transfers and concurrent
+    # calls beyond that drop connections and pay a new TLS handshake each time.
+    # The floor of S3_MAX_CONCURRENCY + 10 keeps one multipart transfer from starving the pool.
+    return BotoConfig(
+        region_name=config.AWS_REGION,
+        retries={
+            'max_attempts': 3,
+            'mode': 'adaptive'
+        },
+        max_pool_connections=max(50, config.S3_MAX_CONCURRENCY * 2, config.S3_MAX_CONCURRENCY + 10),
+        tcp_keepalive=True,
+    )
+
 
 class S3Client:    
     def __init__(self, bucket_name: Optional[str] = None, client: Optional[Any] = None):
@@ -24,32 +68,39 @@ class S3Client:
         if client:
             self.client = client
         else:
-            boto_config = BotoConfig(
-                region_name=config.AWS_REGION,
-                retries={
-                    'max_attempts': 3,
-                    'mode': 'adaptive'
-                }
-            )
+            boto_config = _boto_config(config)
             self.client = boto3.client('s3', config=boto_config)
         
+        # Large parts over many streams: one file saturates the link instead of one TCP connection
+        self._transfer_config = TransferConfig(
+            multipart_threshold=config.S3_MULTIPART_THRESHOLD_MB * 1024 * 1024,
+            multipart_chunksize=config.S3_MULTIPART_CHUNKSIZE_MB * 1024 * 1024,
+            max_concurrency=config.S3_MAX_CONCURRENCY,
+            use_threads=True,
+            max_io_queue=1000,
+        )
+        
         logger.info("s3_client_initialized", bucket=self.bucket_name)
     
     def upload_file(self, local_path: str, s3_key: str, progress_callback: Optional[Callable[[int], None]] = None) -> str:
-        local_file = Path(local_path)
-        
-        if not local_file.exists():
+        # One open + fstat replaces the exists/stat/getsize trio of a path-based upload
+        try:
+            fd = os.open(local_path, os.O_RDONLY)
+        except FileNotFoundError:
             logger.error("file_not_found", path=local_path)
             raise FileNotFoundError(f"File not found: {local_path}")
         
-        file_size = local_file.stat().st_size
-        
         try:
-            logger.info("uploading_file", local_path=local_path, s3_key=s3_key, size_bytes=file_size )
-            if progress_callback:
-                self.client.upload_file(str(local_file), self.bucket_name, s3_key, Callback=progress_callback)
-            else:
-                self.client.upload_file(str(local_file), self.bucket_name, s3_key)
+            with os.fdopen(fd, 'rb') as f:
+                file_size = os.fstat(f.fileno()).st_size
+                logger.info("uploading_file", local_path=local_path, s3_key=s3_key, size_bytes=file_size)
+                
+                if file_size > self._transfer_config.multipart_threshold:
+                    # Multipart parts are read straight from the page cache instead of buffered file reads
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                        self.client.upload_fileobj(mapped, self.bucket_name, s3_key, Callback=progress_callback, Config=self._transfer_config)
+                else:
+                    self.client.upload_fileobj(f, self.bucket_name, s3_key, Callback=progress_callback, Config=self._transfer_config)
             
             s3_uri = f"s3://{self.bucket_name}/{s3_key}"
             logger.info("file_uploaded", s3_uri=s3_uri, size_bytes=file_size)   
@@ -60,14 +111,82 @@ class S3Client:
             logger.error("upload_failed", error_code=error_code, error_message=str(e), s3_key=s3_key)
             raise
     
+    def upload_file_presigned(
+        self,
+        local_path: str,
+        s3_key: str,
+        part_size: int = 64 * 1024 * 1024,
+        workers: int = 16,
+        min_size_mb: int = 256,
+    ) -> str:
+        # boto3 signs and serializes each part on the client, which caps multipart
+        # throughput; presigned URLs move that work up front and parts go out as raw PUTs
+        local_file = Path(local_path)
+        
+        if not local_file.exists():
+            logger.error("file_not_found", path=local_path)
+            raise FileNotFoundError(f"File not found: {local_path}")
+        
+        file_size = local_file.stat().st_size
+        if file_size < min_size_mb * 1024 * 1024:
+            return self.upload_file(local_path, s3_key)
+        
+        # S3 allows at most 10,000 parts per upload
+        part_size = max(part_size, math.ceil(file_size / 10_000))
+        part_count = math.ceil(file_size / part_size)
+        
+        logger.info("uploading_file_presigned", local_path=local_path, s3_key=s3_key, size_bytes=file_size, parts=part_count)
+        upload_id = self.client.create_multipart_upload(Bucket=self.bucket_name, Key=s3_key)['UploadId']
+        
+        try:
+            urls = [
+                self.client.generate_presigned_url(
+                    'upload_part',
+                    Params={'Bucket': self.bucket_name, 'Key': s3_key, 'UploadId': upload_id, 'PartNumber': number},
+                    ExpiresIn=3600,
+                )
+                for number in range(1, part_count + 1)
+            ]
+            
+            session = requests.Session()
+            session.mount('https://', HTTPAdapter(pool_maxsize=workers))
+            session.mount('http://', HTTPAdapter(pool_maxsize=workers))
+            
+            with open(local_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped, memoryview(mapped) as view, session:
+                def put_part(number: int) -> Dict[str, Any]:
+                    start = (number - 1) * part_size
+                    with view[start:start + part_size] as body:
+                        response = session.put(urls[number - 1], data=body)
+                    response.raise_for_status()
+                    return {'PartNumber': number, 'ETag': response.headers['ETag']}
+                
+                with ThreadPoolExecutor(max_workers=max(1, min(workers, part_count))) as pool:
+                    parts = list(pool.map(put_part, range(1, part_count + 1)))
+            
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=s3_key,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': parts},
+            )
+            
+        except Exception as e:
+            logger.error("presigned_upload_failed", error=str(e), s3_key=s3_key)
+            self.client.abort_multipart_upload(Bucket=self.bucket_name, Key=s3_key, UploadId=upload_id)
+            raise
+        
+        s3_uri = f"s3://{self.bucket_name}/{s3_key}"
+        logger.info("file_uploaded", s3_uri=s3_uri, size_bytes=file_size)
+        return s3_uri
+    
     def download_file(self, s3_key: str, local_path: str) -> None:
-        Path(local_path).parent.mkdir(parents=True, exist_ok=True)
-        Path(local_path).parent.mkdir(parents=True, exist_ok=True)
+        local_file = Path(local_path)
+        local_file.parent.mkdir(parents=True, exist_ok=True)
         
         try:
             logger.info( "downloading_file", s3_key=s3_key, local_path=local_path)
-            self.client.download_file(self.bucket_name, s3_key, local_path)
-            file_size = Path(local_path).stat().st_size
+            self.client.download_file(self.bucket_name, s3_key, local_path, Config=self._transfer_config)
+            file_size = local_file.stat().st_size
             
             logger.info("file_downloaded", s3_key=s3_key, local_path=local_path, size_bytes=file_size)
             
@@ -81,24 +200,55 @@ class S3Client:
             logger.error("download_failed", error_code=error_code, error_message=str(e), s3_key=s3_key)
             raise
     
-    def list_files(self, prefix: str = "") -> List[str]:
+    def iter_files(self, prefix: str = "", page_size: int = 1000, max_items: Optional[int] = None) -> Iterator[str]:
+        # Keys are yielded page by page: callers start after one round trip and
+        # memory stays bounded by page_size regardless of bucket size
+        pagination = {'PageSize': page_size}
+        if max_items is not None:
+            pagination['MaxItems'] = max_items
+        
         try:
             logger.debug("listing_files", prefix=prefix)
             
             paginator = self.client.get_paginator('list_objects_v2')
-            pages = paginator.paginate(Bucket=self.bucket_name, Prefix=prefix) 
-            keys = []
+            pages = paginator.paginate(Bucket=self.bucket_name, Prefix=prefix, PaginationConfig=pagination)
             for page in pages:
-                if 'Contents' in page:
-                    keys.extend([obj['Key'] for obj in page['Contents']])
-            
-            logger.info("files_listed", count=len(keys), prefix=prefix)
-            return keys
+                yield from (obj['Key'] for obj in page.get('Contents', ()))
             
         except ClientError as e:
             logger.error("list_failed", error=str(e), prefix=prefix)
             raise
     
+    def list_files(self, prefix: str = "") -> List[str]:
+        keys = list(self.iter_files(prefix))
+        logger.info("files_listed", count=len(keys), prefix=prefix)
+        return keys
+    
+    def list_files_parallel(self, prefixes: Optional[List[str]] = None, workers: int = 16) -> List[str]:
+        # One paginator is strictly serial; listing partitions concurrently overlaps the round trips
+        if prefixes is None:
+            prefixes, root_keys = self._top_level_partitions()
+        else:
+            root_keys = []
+        
+        logger.debug("listing_files_parallel", partitions=len(prefixes), workers=workers)
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(prefixes) or 1))) as pool:
+            keys = list(chain(root_keys, *pool.map(lambda prefix: list(self.iter_files(prefix)), prefixes)))
+        
+        logger.info("files_listed", count=len(keys), partitions=len(prefixes))
+        return keys
+    
+    def _top_level_partitions(self) -> tuple[List[str], List[str]]:
+        # Splitting on "/" covers every key, unlike guessing leading characters
+        paginator = self.client.get_paginator('list_objects_v2')
+        prefixes: List[str] = []
+        root_keys: List[str] = []
+        for page in paginator.paginate(Bucket=self.bucket_name, Delimiter='/'):
+            prefixes.extend(common['Prefix'] for common in page.get('CommonPrefixes', ()))
+            root_keys.extend(obj['Key'] for obj in page.get('Contents', ()))
+        return prefixes, root_keys
+    
     def delete_file(self, s3_key: str) -> None:
         try:
             logger.info("deleting_file", s3_key=s3_key)
@@ -119,6 +269,16 @@ class S3Client:
             if error_code == '404':
                 return False
             raise
+    
+    def files_exist(self, keys: Iterable[str], workers: int = 32) -> Dict[str, bool]:
+        # HEAD requests overlap on the shared client; the default worker count stays
+        # below the connection pool floor set in _boto_config
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(keys)))) as pool:
+            return dict(zip(keys, pool.map(self.file_exists, keys)))
 
 
 class SecretsManagerClient:
@@ -128,37 +288,78 @@ class SecretsManagerClient:
         if client:
             self.client = client
         else:
-            boto_config = BotoConfig(
-                region_name=config.AWS_REGION,
-                retries={
-                    'max_attempts': 3,
-                    'mode': 'adaptive'
-                }
-            )
+            boto_config = _boto_config(config)
             self.client = boto3.client('secretsmanager', config=boto_config)
         
-        self._cache: Dict[str, tuple[Dict[str, Any], float]] = {}
+        # secret name -> (value, refresh_at, expires_at)
+        self._cache: Dict[str, tuple[Dict[str, Any], float, float]] = {}
         self._cache_ttl = 300
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
         
         logger.info("secrets_manager_client_initialized")
     
     def get_secret(self, secret_name: str, use_cache: bool = True) -> Dict[str, Any]:
-        if use_cache and secret_name in self._cache:
-            cached_value, expiry = self._cache[secret_name]
-            if time.time() < expiry:
-                logger.debug("secret_cache_hit", secret_name=secret_name)
-                return cached_value
+        if use_cache:
+            entry = self._cache.get(secret_name)
+            if entry is not None:
+                cached_value, refresh_at, expiry = entry
+                now = time.monotonic()
+                if now < expiry:
+                    if now >= refresh_at:
+                        # Hot secrets are refreshed ahead of expiry so readers never block
+                        self._refresh_in_background(secret_name)
+                    logger.debug("secret_cache_hit", secret_name=secret_name)
+                    return cached_value
+        
+        return self._load_secret(secret_name)
+    
+    def _load_secret(self, secret_name: str) -> Dict[str, Any]:
+        # Single flight: concurrent misses for one secret share a single API call
+        with self._lock:
+            future = self._inflight.get(secret_name)
+            owner = future is None
+            if owner:
+                future = self._inflight[secret_name] = Future()
+        
+        if not owner:
+            return future.result()
         
+        try:
+            secret_value = self._fetch_secret(secret_name)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(secret_value)
+            return secret_value
+        finally:
+            with self._lock:
+                del self._inflight[secret_name]
+    
+    def _refresh_in_background(self, secret_name: str) -> None:
+        if secret_name in self._inflight:
+            return
+        
+        def refresh() -> None:
+            try:
+                self._load_secret(secret_name)
+            except Exception as e:
+                logger.warning("secret_refresh_failed", secret_name=secret_name, error=str(e))
+        
+        threading.Thread(target=refresh, name="secret-refresh", daemon=True).start()
+    
+    def _fetch_secret(self, secret_name: str) -> Dict[str, Any]:
         try:
             logger.info("fetching_secret", secret_name=secret_name) 
             response = self.client.get_secret_value(SecretId=secret_name)    
             secret_string = response['SecretString']
-            secret_value = json.loads(secret_string)
+            secret_value = _json_loads(secret_string)
             
-            self._cache[secret_name] = (
-                secret_value,
-                time.time() + self._cache_ttl
-            )
+            # Jitter spreads expiries so secrets loaded together do not all refetch at once
+            ttl = self._cache_ttl * random.uniform(0.9, 1.1)
+            now = time.monotonic()
+            self._cache[secret_name] = (secret_value, now + ttl * 0.8, now + ttl)
             
             logger.info("secret_retrieved", secret_name=secret_name) 
             return secret_value
@@ -182,7 +383,7 @@ class SecretsManagerClient:
             response = self.client.create_secret(
                 Name=secret_name,
                 Description=description,
-                SecretString=json.dumps(secret_value)
+                SecretString=_json_dumps(secret_value)
             )
             
             arn = response['ARN']  
@@ -199,11 +400,10 @@ class SecretsManagerClient:
             logger.info("updating_secret", secret_name=secret_name) 
             self.client.update_secret(
                 SecretId=secret_name,
-                SecretString=json.dumps(secret_value)
+                SecretString=_json_dumps(secret_value)
             )
             
-            if secret_name in self._cache:
-                del self._cache[secret_name]
+            self._cache.pop(secret_name, None)
             
             logger.info("secret_updated", secret_name=secret_name)
             
@@ -223,16 +423,15 @@ class CloudWatchClient:
         if client:
             self.client = client
         else:
-            boto_config = BotoConfig(
-                region_name=config.AWS_REGION,
-                retries={
-                    'max_attempts': 3,
-                    'mode': 'adaptive'
-                }
-            )
+            boto_config = _boto_config(config)
             self.client = boto3.client('logs', config=boto_config)
         
-        self._sequence_tokens: Dict[str, Optional[str]] = {}
+        self._known_streams: set[str] = set()
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._closed = False
+        self._flusher = threading.Thread(target=self._run_flusher, name="cloudwatch-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
         
         logger.info("cloudwatch_client_initialized")
     
@@ -269,49 +468,114 @@ class CloudWatchClient:
                 )
                 raise
     
-    def put_log_event(self,log_group: str,log_stream: str,message: str) -> None:
-        stream_key = f"{log_group}/{log_stream}"
-        if stream_key not in self._sequence_tokens:
+    def put_log_event(self, log_group: str, log_stream: str, message: str) -> None:
+        # Non-blocking: the flusher thread sends queued events in batches
+        event = {'timestamp': time.time_ns() // 1_000_000, 'message': message}
+        self._queue.put((f"{log_group}/{log_stream}", log_group, log_stream, event))
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+    
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._flusher.join()
+    
+    def _run_flusher(self) -> None:
+        while True:
+            item = self._queue.get()
+            batches: Dict[str, tuple[str, str, List[Dict[str, Any]]]] = {}
+            waiters: List[threading.Event] = []
+            stop = False
+            
+            # Collect for up to one flush interval, or until a full batch is pending
+            deadline = time.monotonic() + _FLUSH_INTERVAL_SECONDS
+            pending = 0
+            while True:
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    stream_key, log_group, log_stream, event = item
+                    batches.setdefault(stream_key, (log_group, log_stream, []))[2].append(event)
+                    pending += 1
+                
+                remaining = deadline - time.monotonic()
+                if stop or waiters or pending >= _MAX_BATCH_EVENTS or remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            
+            for stream_key, (log_group, log_stream, events) in batches.items():
+                events.sort(key=lambda event: event['timestamp'])
+                for batch in _split_log_batch(events):
+                    try:
+                        self._send_batch(stream_key, log_group, log_stream, batch)
+                    except Exception as e:
+                        logger.error(
+                            "put_log_events_failed",
+                            error=str(e),
+                            log_group=log_group,
+                            log_stream=log_stream,
+                            dropped_events=len(batch)
+                        )
+            
+            for waiter in waiters:
+                waiter.set()
+            if stop:
+                return
+    
+    def _send_batch(self, stream_key: str, log_group: str, log_stream: str, events: List[Dict[str, Any]]) -> None:
+        if stream_key not in self._known_streams:
             try:
                 self.create_log_stream(log_group, log_stream)
+                self._known_streams.add(stream_key)
             except ClientError:
                 pass
         
-        try:
-            params = {
-                'logGroupName': log_group,
-                'logStreamName': log_stream,
-                'logEvents': [
-                    {
-                        'timestamp': int(time.time() * 1000),
-                        'message': message
-                    }
-                ]
-            }
-            
-            if stream_key in self._sequence_tokens and self._sequence_tokens[stream_key]:
-                params['sequenceToken'] = self._sequence_tokens[stream_key]
-            
-            response = self.client.put_log_events(**params)
-            
-            self._sequence_tokens[stream_key] = response.get('nextSequenceToken')
-            
-        except ClientError as e:
-            error_code = e.response['Error']['Code']
-            
-            if error_code in ('InvalidSequenceTokenException', 'DataAlreadyAcceptedException'):
-                expected_token = e.response['Error'].get('expectedSequenceToken')
-                self._sequence_tokens[stream_key] = expected_token
-                
-                params['sequenceToken'] = expected_token
-                response = self.client.put_log_events(**params)
-                self._sequence_tokens[stream_key] = response.get('nextSequenceToken')
-            else:
-                logger.error(
-                    "put_log_event_failed",
-                    error_code=error_code,
-                    error=str(e),
-                    log_group=log_group,
-                    log_stream=log_stream
-                )
-                raise
+        # PutLogEvents ignores sequenceToken, so there is no token to thread or race on
+        self.client.put_log_events(
+            logGroupName=log_group,
+            logStreamName=log_stream,
+            logEvents=events
+        )
+
+
+def _split_log_batch(events: List[Dict[str, Any]]) -> Iterator[List[Dict[str, Any]]]:
+    # PutLogEvents accepts at most 10,000 events and 1 MiB (message bytes + 26 per event)
+    batch: List[Dict[str, Any]] = []
+    size = 0
+    for event in events:
+        event_size = len(event['message'].encode('utf-8')) + _EVENT_OVERHEAD_BYTES
+        if batch and (len(batch) >= _MAX_BATCH_EVENTS or size + event_size > _MAX_BATCH_BYTES):
+            yield batch
+            batch, size = [], 0
+        batch.append(event)
+        size += event_size
+    if batch:
+        yield batch
+
+
+# boto3 clients are thread-safe and pool connections internally, so one client per
+# service and bucket is shared process-wide; this also makes the secrets cache global
+@lru_cache(maxsize=None)
+def get_s3_client(bucket_name: Optional[str] = None) -> S3Client:
+    return S3Client(bucket_name=bucket_name)
+
+
+@lru_cache(maxsize=1)
+def get_secrets_client() -> SecretsManagerClient:
+    return SecretsManagerClient()
+
+
+@lru_cache(maxsize=1)
+def get_cloudwatch_client() -> CloudWatchClient:
+    return CloudWatchClient()
+
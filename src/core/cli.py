@@ -1,5 +1,6 @@
 import typer
 import sys
+from functools import lru_cache
 from pathlib import Path
 from rich.console import Console
 from rich.panel import Panel
@@ -18,23 +19,96 @@ app = typer.Typer(help="OpenAegis - Production-grade secure AI agent")
 console = Console()
 logger = get_logger(__name__)
 
+_HEADER_PANEL = Panel.fit(
+    "[bold cyan]OpenAegis Secure Agent[/bold cyan]\n"
+    "[dim]Type 'help' for commands, 'exit' to quit[/dim]",
+    border_style="cyan"
+)
+
+_HELP_TEXT = """
+[bold cyan]Available Commands:[/bold cyan]
+
+[bold]Chat Commands:[/bold]
+  help              Show this help message
+  exit, quit, q     Exit the chat
+  stats             Show session statistics
+  approve <task_id> Approve a pending high-risk task
+  deny <task_id>    Deny a pending high-risk task
+  continue          Continue execution after approval
+
+[bold]Examples:[/bold]
+  "What's in my documents about AWS?"
+  "Organize my Downloads folder"
+  "Run this Python code: print(2+2)"
+  "List all files in my home directory"
+"""
+
+_HELP_PANEL = Panel(_HELP_TEXT, border_style="cyan")
+
+# Columns hold no per-task state, so every spinner shares one set
+_SPINNER_COLUMNS = (SpinnerColumn(), TextColumn("[progress.description]{task.description}"))
+
+# One Config, sandbox and pipeline per process: each DockerSandbox dials the Docker socket
+@lru_cache(maxsize=1)
+def _config() -> Config:
+    return Config()
+
+@lru_cache(maxsize=1)
+def _sandbox() -> DockerSandbox:
+    return DockerSandbox(config=_config())
+
+@lru_cache(maxsize=1)
+def _ingestion_pipeline() -> IngestionPipeline:
+    return IngestionPipeline()
+
+def _progress() -> Progress:
+    return Progress(*_SPINNER_COLUMNS, console=console)
+
+def _enabled(flag: bool) -> str:
+    return "✓ Enabled" if flag else "✗ Disabled"
+
+# (label, value(sandbox_stats, config)) rows for the stats command
+_STATS_SPEC = (
+    ("Docker Available", lambda s, c: "✓ Yes" if s.get("available") else "✗ No"),
+    ("Running Containers", lambda s, c: str(s.get("containers_running", "N/A"))),
+    ("Memory Limit", lambda s, c: c.DOCKER_MEMORY_LIMIT),
+    ("Network Mode", lambda s, c: c.DOCKER_NETWORK_MODE),
+    ("Guardrails", lambda s, c: _enabled(c.ENABLE_GUARDRAILS)),
+    ("Human Approval", lambda s, c: _enabled(c.ENABLE_HUMAN_APPROVAL)),
+    ("Code Analyzer", lambda s, c: _enabled(c.ENABLE_CODE_ANALYZER)),
+    ("Output Sanitizer", lambda s, c: _enabled(c.ENABLE_OUTPUT_SANITIZER)),
+    ("ClamAV", lambda s, c: _enabled(c.ENABLE_CLAMAV)),
+    ("Max Iterations", lambda s, c: str(c.MAX_ITERATIONS)),
+    ("Code Timeout", lambda s, c: f"{c.CODE_EXECUTION_TIMEOUT}s"),
+)
+
+# (label, session stats key) rows for the in-chat stats command
+_SESSION_STATS_SPEC = (
+    ("Total Messages", "total_messages"),
+    ("Completed Tasks", "completed_tasks"),
+    ("Pending Tasks", "pending_tasks"),
+    ("Iterations", "iterations"),
+    ("Guardrail Violations", "guardrail_violations"),
+    ("Pending Approvals", "pending_approvals"),
+)
+
+def _flag_row(name: str, flag: bool, warn_only: bool = False) -> tuple[str, str, str]:
+    if flag:
+        return name, "✓ PASS", "green"
+    return (name, "⚠ WARN", "yellow") if warn_only else (name, "✗ FAIL", "red")
+
 @app.command()
 def chat(session_id: str | None = None):
     """Start interactive chat session with the agent"""
     
     try:
-        config = Config()
-        config.ENABLE_GUARDRAILS = False  # Disable guardrails temporarily
+        # Copy so the override does not leak into the shared config
+        config = _config().model_copy(update={"ENABLE_GUARDRAILS": False})  # Disable guardrails temporarily
         config.ensure_directories()
         
-        console.print(Panel.fit(
-            "[bold cyan]OpenAegis Secure Agent[/bold cyan]\n"
-            "[dim]Type 'help' for commands, 'exit' to quit[/dim]",
-            border_style="cyan"
-        ))
+        console.print(_HEADER_PANEL)
         
-        sandbox = DockerSandbox(config=config)
-        if not sandbox.is_available():
+        if not _sandbox().is_available():
             console.print("[yellow]⚠️  Docker not available. Running in degraded mode (no sandboxing)[/yellow]")
         
         try:
@@ -47,86 +121,53 @@ def chat(session_id: str | None = None):
         
         console.print(f"[dim]Session ID: {orchestrator.session_id}[/dim]\n")
         
-        while True:
-            try:
-                user_input = Prompt.ask("\n[bold green]You[/bold green]")
-                
-                if not user_input.strip():
-                    continue
-                
-                if user_input.lower() in ["exit", "quit", "q"]:
-                    console.print("\n[cyan]Goodbye! 👋[/cyan]")
-                    break
+        try:
+            while True:
+                try:
+                    user_input = Prompt.ask("\n[bold green]You[/bold green]")
                 
-                if user_input.lower() == "help":
-                    _show_help()
-                    continue
+                    cmd = user_input.strip().lower()
+                    if not cmd:
+                        continue
                 
-                if user_input.lower() == "stats":
-                    _show_stats(orchestrator)
-                    continue
+                    if cmd in _EXIT_COMMANDS:
+                        console.print("\n[cyan]Goodbye! 👋[/cyan]")
+                        break
                 
-                if user_input.lower() == "approve_all":
-                    pending = orchestrator.auditor.get_pending_approvals()
-                    if not pending:
-                        console.print("[yellow]No pending approvals[/yellow]")
+                    handler = _CHAT_COMMANDS.get(cmd)
+                    if handler:
+                        handler(orchestrator)
                         continue
-                    for audit_log in pending:
-                        orchestrator.approve_task(audit_log.task_id, reason="User approved all via CLI")
-                    console.print(f"[green]✓ Approved {len(pending)} task(s)[/green]")
-                    with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}"), console=console) as progress:
-                        progress.add_task(description="Executing approved tasks...", total=None)
-                        response = orchestrator.continue_execution()
-                    console.print(f"\n[bold blue]Assistant[/bold blue]: {response}")
-                    continue
                 
-                if user_input.lower() == "deny_all":
-                    pending = orchestrator.auditor.get_pending_approvals()
-                    if not pending:
-                        console.print("[yellow]No pending approvals[/yellow]")
+                    # Task ids and reasons keep their original case
+                    parts = user_input.split(maxsplit=2)
+                    if len(parts) > 1 and parts[0].lower() in ("approve", "deny"):
+                        if parts[0].lower() == "approve":
+                            result = orchestrator.approve_task(parts[1], reason="User approved via CLI")
+                        else:
+                            result = orchestrator.deny_task(parts[1], parts[2] if len(parts) > 2 else "User denied via CLI")
+                        console.print(result)
                         continue
-                    for audit_log in pending:
-                        orchestrator.deny_task(audit_log.task_id, reason="User denied all via CLI")
-                    console.print(f"[red]✗ Denied {len(pending)} task(s)[/red]")
-                    continue
                 
-                if user_input.lower().startswith("approve "):
-                    task_id = user_input.split()[1]
-                    result = orchestrator.approve_task(task_id, reason="User approved via CLI")
-                    console.print(result)
-                    continue
+                    with _progress() as progress:
+                        progress.add_task(description="Processing request...", total=None)
+                        response = orchestrator.process_user_message(user_input)
                 
-                if user_input.lower().startswith("deny "):
-                    parts = user_input.split(maxsplit=2)
-                    task_id = parts[1]
-                    reason = parts[2] if len(parts) > 2 else "User denied via CLI"
-                    result = orchestrator.deny_task(task_id, reason)
-                    console.print(result)
-                    continue
+                    if "APPROVAL REQUIRED" in response:
+                        console.print(Panel(response, border_style="yellow", title="⚠️  Approval Required"))
+                    else:
+                        console.print(f"\n[bold blue]Assistant[/bold blue]: {response}")
                 
-                if user_input.lower() == "continue":
-                    with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}"), console=console) as progress:
-                        progress.add_task(description="Continuing execution...", total=None)
-                        response = orchestrator.continue_execution()
-                    console.print(f"\n[bold blue]Assistant[/bold blue]: {response}")
+                except KeyboardInterrupt:
+                    console.print("\n[yellow]Use 'exit' to quit[/yellow]")
                     continue
-                
-                with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}"), console=console) as progress:
-                    progress.add_task(description="Processing request...", total=None)
-                    response = orchestrator.process_user_message(user_input)
-                
-                if "APPROVAL REQUIRED" in response:
-                    console.print(Panel(response, border_style="yellow", title="⚠️  Approval Required"))
-                else:
-                    console.print(f"\n[bold blue]Assistant[/bold blue]: {response}")
-                
-            except KeyboardInterrupt:
-                console.print("\n[yellow]Use 'exit' to quit[/yellow]")
-                continue
-            except Exception as e:
-                logger.error("chat_error", error=str(e))
-                console.print(f"[red]Error: {str(e)}[/red]")
-                continue
+                except Exception as e:
+                    logger.error("chat_error", error=str(e))
+                    console.print(f"[red]Error: {str(e)}[/red]")
+                    continue
+        finally:
+            orchestrator.close()
+
     
     except Exception as e:
         logger.error("chat_initialization_failed", error=str(e))
@@ -141,8 +182,7 @@ def ingest(
     """Ingest documents into vector store for Q&A"""
     
     try:
-        config = Config()
-        pipeline = IngestionPipeline(config=config)
+        pipeline = _ingestion_pipeline()
         
         path_obj = Path(path)
         
@@ -153,7 +193,7 @@ def ingest(
         console.print(f"\n[cyan]Starting document ingestion from:[/cyan] {path}")
         
         if path_obj.is_file():
-            with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}"), console=console) as progress:
+            with _progress() as progress:
                 progress.add_task(description=f"Ingesting {path_obj.name}...", total=None)
                 result = pipeline.ingest_file(str(path_obj))
             
@@ -166,13 +206,22 @@ def ingest(
         
         elif path_obj.is_dir():
             console.print(f"[cyan]Scanning directory...[/cyan]")
-            result = pipeline.ingest_directory(str(path_obj), recursive=recursive)
+            successful = failed = 0
+            
+            with _progress() as progress:
+                task = progress.add_task(description="Ingesting files...", total=None)
+                for result in pipeline.iter_ingest_directory(str(path_obj), recursive=recursive):
+                    if result["status"] == "success":
+                        successful += 1
+                    else:
+                        failed += 1
+                        progress.console.print(f"[red]✗ {Path(result['file']).name}: {result['error']}[/red]")
+                    progress.update(task, description=f"Ingested {successful + failed} file(s)...")
             
             console.print(f"\n[green]Ingestion complete:[/green]")
-            console.print(f"  Files processed: {result['files_processed']}")
-            console.print(f"  Successful: {result['successful']}")
-            console.print(f"  Failed: {result['failed']}")
-            console.print(f"  Total chunks: {result['total_chunks']}")
+            console.print(f"  Files processed: {successful + failed}")
+            console.print(f"  Successful: {successful}")
+            console.print(f"  Failed: {failed}")
     
     except Exception as e:
         logger.error("ingestion_failed", error=str(e))
@@ -184,26 +233,16 @@ def stats():
     """Show system statistics and metrics"""
     
     try:
-        config = Config()
+        config = _config()
         
         table = Table(title="OpenAegis System Statistics", show_header=True, header_style="bold cyan")
         table.add_column("Metric", style="cyan")
         table.add_column("Value", style="green")
         
-        sandbox = DockerSandbox(config=config)
-        sandbox_stats = sandbox.get_sandbox_stats()
+        sandbox_stats = _sandbox().get_sandbox_stats()
         
-        table.add_row("Docker Available", "✓ Yes" if sandbox_stats.get("available") else "✗ No")
-        table.add_row("Running Containers", str(sandbox_stats.get("containers_running", "N/A")))
-        table.add_row("Memory Limit", config.DOCKER_MEMORY_LIMIT)
-        table.add_row("Network Mode", config.DOCKER_NETWORK_MODE)
-        table.add_row("Guardrails", "✓ Enabled" if config.ENABLE_GUARDRAILS else "✗ Disabled")
-        table.add_row("Human Approval", "✓ Enabled" if config.ENABLE_HUMAN_APPROVAL else "✗ Disabled")
-        table.add_row("Code Analyzer", "✓ Enabled" if config.ENABLE_CODE_ANALYZER else "✗ Disabled")
-        table.add_row("Output Sanitizer", "✓ Enabled" if config.ENABLE_OUTPUT_SANITIZER else "✗ Disabled")
-        table.add_row("ClamAV", "✓ Enabled" if config.ENABLE_CLAMAV else "✗ Disabled")
-        table.add_row("Max Iterations", str(config.MAX_ITERATIONS))
-        table.add_row("Code Timeout", f"{config.CODE_EXECUTION_TIMEOUT}s")
+        for label, value in _STATS_SPEC:
+            table.add_row(label, value(sandbox_stats, config))
         
         console.print(table)
         
@@ -218,22 +257,18 @@ def test():
     
     console.print("[cyan]Running system tests...[/cyan]\n")
     
-    config = Config()
-    results = []
+    config = _config()
     
     console.print("[bold]Security Tests:[/bold]")
     
-    sandbox = DockerSandbox(config=config)
-    if sandbox.is_available():
-        results.append(("Docker Sandbox", "✓ PASS", "green"))
-    else:
-        results.append(("Docker Sandbox", "✗ FAIL", "red"))
-    
-    results.append(("Guardrails", "✓ PASS" if config.ENABLE_GUARDRAILS else "✗ FAIL", "green" if config.ENABLE_GUARDRAILS else "red"))
-    results.append(("Human Approval", "✓ PASS" if config.ENABLE_HUMAN_APPROVAL else "⚠ WARN", "green" if config.ENABLE_HUMAN_APPROVAL else "yellow"))
-    results.append(("Code Analyzer", "✓ PASS" if config.ENABLE_CODE_ANALYZER else "✗ FAIL", "green" if config.ENABLE_CODE_ANALYZER else "red"))
-    results.append(("Output Sanitizer", "✓ PASS" if config.ENABLE_OUTPUT_SANITIZER else "✗ FAIL", "green" if config.ENABLE_OUTPUT_SANITIZER else "red"))
-    results.append(("ClamAV", "✓ PASS" if config.ENABLE_CLAMAV else "⚠ WARN", "green" if config.ENABLE_CLAMAV else "yellow"))
+    results = [
+        _flag_row("Docker Sandbox", _sandbox().is_available()),
+        _flag_row("Guardrails", config.ENABLE_GUARDRAILS),
+        _flag_row("Human Approval", config.ENABLE_HUMAN_APPROVAL, warn_only=True),
+        _flag_row("Code Analyzer", config.ENABLE_CODE_ANALYZER),
+        _flag_row("Output Sanitizer", config.ENABLE_OUTPUT_SANITIZER),
+        _flag_row("ClamAV", config.ENABLE_CLAMAV, warn_only=True),
+    ]
     
     table = Table(show_header=False)
     table.add_column("Test", style="cyan")
@@ -244,7 +279,7 @@ def test():
     
     console.print(table)
     
-    passed = sum(1 for _, result, _ in results if "PASS" in result)
+    passed = sum(1 for _, _, color in results if color == "green")
     total = len(results)
     
     console.print(f"\n[bold]Results:[/bold] {passed}/{total} tests passed")
@@ -257,24 +292,32 @@ def test():
         console.print("[red]✗ System has critical issues[/red]")
 
 def _show_help():
-    help_text = """
-[bold cyan]Available Commands:[/bold cyan]
+    console.print(_HELP_PANEL)
 
-[bold]Chat Commands:[/bold]
-  help              Show this help message
-  exit, quit, q     Exit the chat
-  stats             Show session statistics
-  approve <task_id> Approve a pending high-risk task
-  deny <task_id>    Deny a pending high-risk task
-  continue          Continue execution after approval
+def _approve_all(orchestrator: AgentOrchestrator):
+    pending = orchestrator.auditor.get_pending_approvals()
+    if not pending:
+        console.print("[yellow]No pending approvals[/yellow]")
+        return
+    for audit_log in pending:
+        orchestrator.approve_task(audit_log.task_id, reason="User approved all via CLI")
+    console.print(f"[green]✓ Approved {len(pending)} task(s)[/green]")
+    _run_continuation(orchestrator, "Executing approved tasks...")
 
-[bold]Examples:[/bold]
-  "What's in my documents about AWS?"
-  "Organize my Downloads folder"
-  "Run this Python code: print(2+2)"
-  "List all files in my home directory"
-"""
-    console.print(Panel(help_text, border_style="cyan"))
+def _deny_all(orchestrator: AgentOrchestrator):
+    pending = orchestrator.auditor.get_pending_approvals()
+    if not pending:
+        console.print("[yellow]No pending approvals[/yellow]")
+        return
+    for audit_log in pending:
+        orchestrator.deny_task(audit_log.task_id, reason="User denied all via CLI")
+    console.print(f"[red]✗ Denied {len(pending)} task(s)[/red]")
+
+def _run_continuation(orchestrator: AgentOrchestrator, description: str = "Continuing execution..."):
+    with _progress() as progress:
+        progress.add_task(description=description, total=None)
+        response = orchestrator.continue_execution()
+    console.print(f"\n[bold blue]Assistant[/bold blue]: {response}")
 
 def _show_stats(orchestrator: AgentOrchestrator):
     stats = orchestrator.get_session_stats()
@@ -284,14 +327,21 @@ def _show_stats(orchestrator: AgentOrchestrator):
     table.add_column("Value", style="green")
     
     table.add_row("Session ID", stats["session_id"][:16] + "...")
-    table.add_row("Total Messages", str(stats["total_messages"]))
-    table.add_row("Completed Tasks", str(stats["completed_tasks"]))
-    table.add_row("Pending Tasks", str(stats["pending_tasks"]))
-    table.add_row("Iterations", str(stats["iterations"]))
-    table.add_row("Guardrail Violations", str(stats["guardrail_violations"]))
-    table.add_row("Pending Approvals", str(stats["pending_approvals"]))
+    for label, key in _SESSION_STATS_SPEC:
+        table.add_row(label, str(stats[key]))
     
     console.print(table)
 
+_EXIT_COMMANDS = frozenset({"exit", "quit", "q"})
+
+# Exact-match chat commands; approve/deny <task_id> take arguments and are parsed separately
+_CHAT_COMMANDS = {
+    "help": lambda orchestrator: _show_help(),
+    "stats": _show_stats,
+    "approve_all": _approve_all,
+    "deny_all": _deny_all,
+    "continue": _run_continuation,
+}
+
 if __name__ == "__main__":
     app()
@@ -1,8 +1,9 @@
 import os
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Literal, Optional
 
-from pydantic import Field
+from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 
@@ -17,12 +18,16 @@ class Config(BaseSettings):
         default="openaegis/dev/anthropic_api_key",
         description="Secrets Manager secret name for Anthropic API key"
     )
+    S3_MULTIPART_THRESHOLD_MB: int = Field(default=64, description="File size above which S3 transfers switch to multipart (MB)")
+    S3_MULTIPART_CHUNKSIZE_MB: int = Field(default=64, description="Part size for multipart S3 transfers (MB)")
+    S3_MAX_CONCURRENCY: int = Field(default=16, description="Parallel part transfers per S3 upload or download")
     
     # Anthropic Configuration
     ANTHROPIC_API_KEY: Optional[str] = Field(default=None, description="Anthropic API key (from env or Secrets Manager)")
     ANTHROPIC_MODEL: str = Field(default="claude-sonnet-4-20250514", description="Anthropic Claude model identifier")
     MAX_TOKENS: int = Field(default=4096, description="Maximum tokens for LLM responses")
     TEMPERATURE: float = Field(default=0.7, description="LLM temperature for response generation")
+    ANTHROPIC_MAX_CONNECTIONS: int = Field(default=20, description="Connection pool size shared by all Anthropic API calls")
     
     # Local Storage Configuration
     LANCEDB_PATH: str = Field(
@@ -39,8 +44,24 @@ class Config(BaseSettings):
         default="sentence-transformers/all-MiniLM-L6-v2",
         description="Sentence transformers model for embeddings"
     )
+    EMBEDDING_BATCH_MAX_SIZE: int = Field(default=32, description="Concurrent embed_text calls coalesced into one forward pass (1 disables)")
+    EMBEDDING_BATCH_WAIT_MS: float = Field(default=0.0, description="Extra time to wait for more embed_text calls before running a batch")
     CHUNK_SIZE: int = Field(default=512, description="Text chunk size for embeddings (tokens)")
     CHUNK_OVERLAP: int = Field(default=50, description="Overlap between chunks (tokens)")
+    INGEST_WORKERS: int = Field(default=8, description="Files ingested concurrently when ingesting a directory")
+    QUERY_CACHE_MAX_ENTRIES: int = Field(default=1024, description="Maximum cached document search queries")
+    QUERY_CACHE_TTL_SECONDS: int = Field(default=300, description="Lifetime of cached document search results in seconds")
+    QUERY_DISK_CACHE_DIR: str | None = Field(
+        default=None,
+        description="Directory for a persistent document search cache shared across restarts (disabled when unset)"
+    )
+    QUERY_DISK_CACHE_TTL_SECONDS: int = Field(default=86400, description="Lifetime of persisted document search results in seconds")
+    VECTOR_INT8_SEARCH: bool = Field(default=True, description="Pre-rank batched searches on int8-quantized embeddings")
+    VECTOR_RERANK_CANDIDATES: int = Field(default=50, description="Candidates per query re-scored in float32 after int8 pre-ranking")
+    VECTOR_STORAGE_DTYPE: Literal["float32", "float16"] = Field(
+        default="float32",
+        description="Element type of the embedding column for newly created tables (existing tables keep theirs)"
+    )
     MAX_FILE_SIZE_MB: int = Field(default=10, description="Maximum file size for uploads (MB)")
     ALLOWED_EXTENSIONS: list = Field(
         default=[".pdf", ".txt", ".docx", ".md", ".html"],
@@ -61,18 +82,33 @@ class Config(BaseSettings):
     # Security Configuration
     ENABLE_CLAMAV: bool = Field(default=True, description="Enable ClamAV malware scanning")
     CLAMAV_SOCKET: str = Field(default="/tmp/clamd.socket", description="ClamAV socket path")
+    CLAMAV_USE_INSTREAM: bool = Field(
+        default=False,
+        description="Always stream file contents to clamd (for a clamd that cannot see this host's filesystem)"
+    )
     
     # Agent Configuration
     MAX_ITERATIONS: int = Field(default=10, description="Maximum agent iterations per session")
+    MAX_PARALLEL_TASKS: int = Field(default=4, description="Maximum independent plan tasks executed concurrently")
     MAX_RETRIES: int = Field(default=3, description="Maximum retry attempts for failed operations")
-    RETRY_DELAY_SECONDS: int = Field(default=2, description="Delay between retries in seconds")
+    RETRY_DELAY_SECONDS: int = Field(default=2, description="Initial delay between retries in seconds")
+    RETRY_MAX_DELAY_SECONDS: int = Field(default=30, description="Upper bound for exponential retry backoff in seconds")
+    RETRY_BACKOFF_MULTIPLIER: float = Field(default=3.0, description="Growth factor for decorrelated-jitter retry backoff")
     ENABLE_GUARDRAILS: bool = Field(default=True, description="Enable NeMo Guardrails input/output validation")
     ENABLE_HUMAN_APPROVAL: bool = Field(default=True, description="Require human approval for high-risk tasks")
+    SPECULATIVE_PLANNING: bool = Field(
+        default=False,
+        description="Start planning while input guardrails run; blocked inputs are still sent to the planner model, only their plan is discarded"
+    )
     APPROVAL_THRESHOLD: str = Field(
         default="HIGH",
         description="Minimum risk level requiring approval: LOW, MEDIUM, HIGH, CRITICAL (default: HIGH - only dangerous operations)"
     )
     CODE_EXECUTION_TIMEOUT: int = Field(default=30, description="Code execution timeout in seconds")
+    CODE_INTERPRETER_POOL_SIZE: int = Field(
+        default=0,
+        description="Pre-warmed Python workers for unsandboxed code execution (0 = new interpreter per call)"
+    )
     MAX_FILE_READ_SIZE_MB: int = Field(default=10, description="Maximum file size for read operations (MB)")
     MAX_CONVERSATION_MESSAGES: int = Field(default=10, description="Maximum messages to include in conversation context")
     
@@ -105,25 +141,36 @@ class Config(BaseSettings):
         "extra": "ignore"
     }
     
+    @field_validator("ENVIRONMENT")
+    @classmethod
+    def _lower_environment(cls, value: str) -> str:
+        # Normalized once here so environment checks compare without lowering each time
+        return value.lower()
+    
     def ensure_directories(self) -> None:
         Path(self.LANCEDB_PATH).mkdir(parents=True, exist_ok=True)
         Path(self.WORKSPACE_PATH).mkdir(parents=True, exist_ok=True)
     
     def is_production(self) -> bool:
-        return self.ENVIRONMENT.lower() in ("prod", "production")
+        return self.ENVIRONMENT in ("prod", "production")
     
     def is_development(self) -> bool:
-        return self.ENVIRONMENT.lower() in ("dev", "development", "local")
-
-_config_instance: Optional[Config] = None
+        return self.ENVIRONMENT in ("dev", "development", "local")
+    
+    def resolve_anthropic_api_key(self) -> Optional[str]:
+        # Secrets Manager is only called on first use by an LLM client, never while
+        # loading settings; development keeps reading the key from env/.env
+        if self.ANTHROPIC_API_KEY is None and not self.is_development():
+            from src.core.aws_client import get_secrets_client
+            secret = get_secrets_client().get_secret(self.SECRETS_MANAGER_SECRET_NAME)
+            self.ANTHROPIC_API_KEY = secret.get("api_key")
+        return self.ANTHROPIC_API_KEY
 
+@lru_cache(maxsize=1)
 def get_config() -> Config:
-    global _config_instance
-    if _config_instance is None:
-        _config_instance = Config()
-        _config_instance.ensure_directories()
-    return _config_instance
+    config = Config()
+    config.ensure_directories()
+    return config
 
 def reset_config() -> None:
-    global _config_instance
-    _config_instance = None
+    get_config.cache_clear()
@@ -0,0 +1,46 @@
+import threading
+from typing import Any
+
+import anthropic
+import httpx
+
+from src.core.config import Config
+from src.core.logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+_lock = threading.Lock()
+_sync_clients: dict[str, anthropic.Anthropic] = {}
+
+
+def _http_client_kwargs(config: Config) -> dict[str, Any]:
+    return {
+        "limits": httpx.Limits(
+            max_connections=config.ANTHROPIC_MAX_CONNECTIONS,
+            max_keepalive_connections=config.ANTHROPIC_MAX_CONNECTIONS,
+        ),
+        "http2": HTTP2_AVAILABLE,
+    }
+
+
+def get_anthropic_client(config: Config) -> anthropic.Anthropic:
+    key = config.resolve_anthropic_api_key() or ""
+    client = _sync_clients.get(key)
+    if client is None:
+        with _lock:
+            client = _sync_clients.get(key)
+            if client is None:
+                client = anthropic.Anthropic(
+                    api_key=key or None,
+                    http_client=httpx.Client(**_http_client_kwargs(config)),
+                )
+                _sync_clients[key] = client
+                logger.info("anthropic_client_initialized", http2=HTTP2_AVAILABLE)
+    return client
+
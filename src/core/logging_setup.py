@@ -1,6 +1,13 @@
+import atexit
 import logging
+import queue
+import re
 import sys
+import threading
 import uuid
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener
+from secrets import token_hex
 from typing import Any, Dict, Optional
 
 import structlog
@@ -9,33 +16,88 @@ import watchtower
 
 from src.core.config import get_config
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 SENSITIVE_FIELDS = {
     "key", "secret", "password", "token", "api_key", 
     "apikey", "api-key", "auth", "credential", "private"
 }
 
+# One case-insensitive alternation scans each key once instead of a lower() plus a probe per field
+_SENSITIVE_RE = re.compile("|".join(map(re.escape, sorted(SENSITIVE_FIELDS))), re.IGNORECASE)
+
+
+# Event keys come from a small, fixed set of call-site kwargs, so after warm-up the
+# verdict is a cache hit instead of a regex scan
+@lru_cache(maxsize=4096)
+def _is_sensitive_key(key: str) -> bool:
+    return _SENSITIVE_RE.search(key) is not None
+
+# Records buffered for CloudWatch before new ones start being dropped
+LOG_QUEUE_SIZE = 10_000
+
 
 def mask_sensitive_data(_, __, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+    is_sensitive = _is_sensitive_key
     for key, value in event_dict.items():
-        if any(sensitive in key.lower() for sensitive in SENSITIVE_FIELDS):
-            if isinstance(value, str) and value:
-                if len(value) > 4:
-                    event_dict[key] = f"***{value[-4:]}"
-                else:
-                    event_dict[key] = "****"
-            else:
-                event_dict[key] = "****"
+        if is_sensitive(key):
+            text = value if isinstance(value, str) else ""
+            event_dict[key] = f"***{text[-4:]}" if len(text) > 4 else "****"
     
     return event_dict
 
 
+def _orjson_dumps(value: Any, **kwargs: Any) -> str:
+    # stdlib logging handlers take str messages, so the bytes are decoded once here
+    return orjson.dumps(value, default=kwargs.get("default"), option=orjson.OPT_NON_STR_KEYS).decode()
+
+
 def add_correlation_id(_, __, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+    # Entry points bind an id with set_correlation_id; this only covers events logged outside one
     if "correlation_id" not in event_dict:
-        event_dict["correlation_id"] = str(uuid.uuid4())
+        event_dict["correlation_id"] = token_hex(16)
     
     return event_dict
 
 
+class _DroppingQueueHandler(QueueHandler):
+    # A full queue drops the record instead of blocking or reporting an error per record
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+def _start_cloudwatch_listener(queue_handler: QueueHandler, env: str, level: int) -> None:
+    try:
+        # Batches are shipped at PutLogEvents' limits (10,000 events / 1 MiB)
+        cloudwatch_handler = watchtower.CloudWatchLogHandler(
+            log_group=f"/openaegis/{env}/app",
+            stream_name=f"{uuid.uuid4().hex}",
+            send_interval=10,
+            max_batch_size=1_048_576,
+            max_batch_count=10_000,
+            create_log_group=True,
+            create_log_stream=True,
+            use_queues=True
+        )
+    except Exception as e:
+        # Every record already reaches stdout, so the queued copies are simply dropped
+        logging.getLogger().removeHandler(queue_handler)
+        logging.warning(f"Failed to setup CloudWatch logging: {e}")
+        return
+    
+    cloudwatch_handler.setLevel(level)
+    listener = QueueListener(queue_handler.queue, cloudwatch_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+
 def setup_logging(environment: Optional[str] = None,log_level: str = "INFO") -> None:
     
     config = get_config()
@@ -49,6 +111,7 @@ def setup_logging(environment: Optional[str] = None,log_level: str = "INFO") ->
     )
     
     shared_processors = [
+        structlog.contextvars.merge_contextvars,
         structlog.stdlib.add_log_level,
         structlog.stdlib.add_logger_name,
         structlog.processors.TimeStamper(fmt="iso"),
@@ -60,22 +123,20 @@ def setup_logging(environment: Optional[str] = None,log_level: str = "INFO") ->
     
     if env.lower() in ("prod", "production"):
         processors = shared_processors + [
-            structlog.processors.JSONRenderer()
+            structlog.processors.JSONRenderer(serializer=_orjson_dumps) if ORJSON_AVAILABLE
+            else structlog.processors.JSONRenderer()
         ]
         
-        try:
-            cloudwatch_handler = watchtower.CloudWatchLogHandler(
-                log_group=f"/openaegis/{env}/app",
-                stream_name=f"{uuid.uuid4().hex}",
-                send_interval=5,
-                create_log_group=True
-            )
-            cloudwatch_handler.setLevel(numeric_level)
-            
-            root_logger = logging.getLogger()
-            root_logger.addHandler(cloudwatch_handler)
-        except Exception as e:
-            logging.warning(f"Failed to setup CloudWatch logging: {e}")
+        # Handler setup makes blocking CloudWatch API calls, so it happens in the background;
+        # records logged meanwhile wait in the bounded queue
+        queue_handler = _DroppingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+        logging.getLogger().addHandler(queue_handler)
+        threading.Thread(
+            target=_start_cloudwatch_listener,
+            args=(queue_handler, env, numeric_level),
+            name="cloudwatch-log-setup",
+            daemon=True
+        ).start()
     
     else:
         processors = shared_processors + [
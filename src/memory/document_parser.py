@@ -2,9 +2,15 @@
 Document parser for extracting text from various file formats.
 """
 
+import hashlib
+import os
+import re
+import threading
 import magic
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional
+from stat import S_ISREG
+from typing import Iterable, Iterator, List, Optional, Tuple
 
 from unstructured.partition.auto import partition
 
@@ -12,10 +18,27 @@ from src.core.logging_setup import get_logger
 
 logger = get_logger(__name__)
 
+_BOUNDARY_RE = re.compile(r"[.!?][ \n]")
+_BOUNDARY_SEARCH_RANGE = 100
+
+# libmagic inspects at most the first 1 MiB of a file, so a head of that size types a
+# buffer exactly as from_file would
+_MAGIC_HEAD_BYTES = 1024 * 1024
+
+
+@dataclass(frozen=True, slots=True)
+class FileProbe:
+    size: int
+    modified_time: float
+    mime_type: str
+    sha256: Optional[str]
+    head: bytes
+
 
 class DocumentParser:
     
     def __init__(self):
+        self._local = threading.local()
         logger.info("document_parser_initialized")
     
     def detect_file_type(self, file_path: str) -> str:
@@ -24,14 +47,48 @@ class DocumentParser:
         if not file_path.exists():
             raise FileNotFoundError(f"File not found: {file_path}")
         
-        mime = magic.Magic(mime=True)
-        mime_type = mime.from_file(str(file_path))
+        mime_type = self._magic().from_file(str(file_path))
         
         logger.debug("file_type_detected", file=file_path.name, mime_type=mime_type)
         
         return mime_type
     
+    def probe(self, file_path: str, hash_limit: Optional[int] = None, hash_content: bool = True) -> FileProbe:
+        # One open serves size, type and content hash; files over hash_limit are not hashed.
+        # O_NONBLOCK keeps a FIFO from blocking the open, and fstat rejects anything but a regular file.
+        fd = os.open(file_path, os.O_RDONLY | os.O_NONBLOCK)
+        stat = os.fstat(fd)
+        if not S_ISREG(stat.st_mode):
+            os.close(fd)
+            raise ValueError(f"Path is not a file: {file_path}")
+        
+        with open(fd, 'rb') as f:
+            head = f.read(_MAGIC_HEAD_BYTES)
+            mime_type = self._magic().from_buffer(head)
+            
+            sha256 = None
+            if hash_content and (hash_limit is None or stat.st_size <= hash_limit):
+                digest = hashlib.sha256(head)
+                for block in iter(lambda: f.read(_MAGIC_HEAD_BYTES), b""):
+                    digest.update(block)
+                sha256 = digest.hexdigest()
+        
+        logger.debug("file_probed", file=Path(file_path).name, size_bytes=stat.st_size, mime_type=mime_type)
+        
+        return FileProbe(stat.st_size, stat.st_mtime, mime_type, sha256, head)
+    
+    def _magic(self) -> magic.Magic:
+        # Loading the magic database is expensive and a handle is not safe to share
+        # across threads, so each ingestion worker keeps its own
+        mime = getattr(self._local, "mime", None)
+        if mime is None:
+            mime = self._local.mime = magic.Magic(mime=True)
+        return mime
+    
     def parse_file(self, file_path: str) -> str:
+        return "\n".join(self.iter_text(file_path))
+    
+    def iter_text(self, file_path: str) -> Iterator[str]:
         file_path = Path(file_path)
         
         if not file_path.exists():
@@ -42,23 +99,6 @@ class DocumentParser:
         
         try:
             elements = partition(filename=str(file_path))
-            
-            text_parts = []
-            for element in elements:
-                if hasattr(element, 'text'):
-                    text_parts.append(element.text)
-            
-            full_text = "\n".join(text_parts)
-            
-            logger.info(
-                "file_parsed",
-                file=file_path.name,
-                extracted_length=len(full_text),
-                elements_count=len(elements)
-            )
-            
-            return full_text
-            
         except Exception as e:
             logger.error(
                 "parsing_failed",
@@ -66,6 +106,16 @@ class DocumentParser:
                 error=str(e)
             )
             raise ValueError(f"Failed to parse file: {e}")
+        
+        logger.info(
+            "file_parsed",
+            file=file_path.name,
+            elements_count=len(elements)
+        )
+        
+        for element in elements:
+            if hasattr(element, 'text'):
+                yield element.text
     
     def chunk_text(self, text: str, chunk_size: int = 512, chunk_overlap: int = 50) -> List[str]:
         if len(text) <= chunk_size:
@@ -78,60 +128,81 @@ class DocumentParser:
             chunk_overlap=chunk_overlap
         )
         
-        chunks = []
+        chunks = self.materialize(text, self.chunk_offsets(text, chunk_size, chunk_overlap))
+        
+        logger.info("text_chunked", num_chunks=len(chunks))
+        
+        return chunks
+    
+    def chunk_stream(self, parts: Iterable[str], chunk_size: int = 512, chunk_overlap: int = 50) -> Iterator[str]:
+        # Same chunks as chunk_text("\n".join(parts)), without building the joined text;
+        # only the unconsumed tail plus one boundary lookahead is kept between parts
+        lookahead = chunk_size + _BOUNDARY_SEARCH_RANGE
+        window = None
+        emitted = False
+        
+        for part in parts:
+            window = part if window is None else window + "\n" + part
+            start = 0
+            
+            while len(window) - start > lookahead:
+                end = self._find_sentence_boundary(window, start + chunk_size)
+                chunk = window[start:end].strip()
+                if chunk:
+                    yield chunk
+                emitted = True
+                start = end - chunk_overlap
+            
+            window = window[start:]
+        
+        window = window or ""
+        if not emitted and len(window) <= chunk_size:
+            yield window
+        else:
+            yield from self.materialize(window, self.chunk_offsets(window, chunk_size, chunk_overlap))
+    
+    def chunk_offsets(self, text: str, chunk_size: int = 512, chunk_overlap: int = 50) -> Iterator[Tuple[int, int]]:
+        # Chunk boundaries only; no substring is copied until materialize()
+        text_length = len(text)
         start = 0
         
-        while start < len(text):
+        while start < text_length:
             end = start + chunk_size
             
-            if end < len(text):
+            if end < text_length:
                 end = self._find_sentence_boundary(text, end)
             
-            chunk = text[start:end].strip()
+            yield start, end
             
+            start = end - chunk_overlap
+    
+    @staticmethod
+    def materialize(text: str, offsets: Iterable[Tuple[int, int]]) -> List[str]:
+        chunks = []
+        for start, end in offsets:
+            chunk = text[start:end].strip()
             if chunk:
                 chunks.append(chunk)
-            
-            start = end - chunk_overlap
-            
-            if start >= len(text):
-                break
-        
-        logger.info("text_chunked", num_chunks=len(chunks))
-        
         return chunks
     
     def _find_sentence_boundary(self, text: str, position: int) -> int:
-        sentence_endings = ['. ', '.\n', '! ', '!\n', '? ', '?\n']
-        
-        search_range = 100
-        end_search = min(position + search_range, len(text))
-        
-        best_pos = position
-        min_distance = search_range
-        
-        for ending in sentence_endings:
-            pos = text.find(ending, position, end_search)
-            if pos != -1:
-                distance = pos - position
-                if distance < min_distance:
-                    min_distance = distance
-                    best_pos = pos + len(ending)
-        
-        return best_pos
+        # Nearest sentence end within the search range, or position if none
+        match = _BOUNDARY_RE.search(text, position, position + _BOUNDARY_SEARCH_RANGE)
+        return match.end() if match else position
     
-    def extract_metadata(self, file_path: str) -> dict:
+    def extract_metadata(self, file_path: str, probe: Optional[FileProbe] = None) -> dict:
         file_path = Path(file_path)
         
-        stat = file_path.stat()
-        mime_type = self.detect_file_type(str(file_path))
+        if probe is None:
+            probe = self.probe(str(file_path))
         
         metadata = {
             "filename": file_path.name,
             "extension": file_path.suffix,
-            "size_bytes": stat.st_size,
-            "mime_type": mime_type,
-            "modified_time": stat.st_mtime
+            "size_bytes": probe.size,
+            "mime_type": probe.mime_type,
+            "modified_time": probe.modified_time,
+            "sha256": probe.sha256
         }
         
         logger.debug("metadata_extracted", file=file_path.name, **metadata)
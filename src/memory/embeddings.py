@@ -4,8 +4,14 @@ Embedding service for document vectorization.
 Uses sentence-transformers for generating embeddings.
 """
 
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from functools import lru_cache
 from typing import List
 
+import numpy as np
 from sentence_transformers import SentenceTransformer
 
 from src.core.config import get_config
@@ -13,22 +19,93 @@ from src.core.logging_setup import get_logger
 
 logger = get_logger(__name__)
 
+_model_lock = threading.Lock()
 
+
+# Weights and tokenizer are loaded once per process and shared by every EmbeddingService;
+# callers hold _model_lock so concurrent first uses do not load the model twice
+@lru_cache(maxsize=None)
+def _load_model(model_name: str) -> SentenceTransformer:
+    logger.info("loading_embedding_model", model=model_name)
+    model = SentenceTransformer(model_name)
+    logger.info("embedding_model_loaded", model=model_name)
+    return model
+
+
+class _RequestQueue:
+    
+    def __init__(self, model: SentenceTransformer, max_batch_size: int, max_wait_ms: float):
+        self._model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._pending: "queue.SimpleQueue[tuple[str, Future]]" = queue.SimpleQueue()
+        self._leader = threading.Lock()
+    
+    def encode(self, text: str) -> List[float]:
+        future: Future = Future()
+        self._pending.put((text, future))
+        # Whoever holds _leader runs the forward pass on its own thread, so a lone call never
+        # hands off; callers that queue up meanwhile are answered by the next leader's batch
+        while not future.done():
+            with self._leader:
+                if not future.done():
+                    self._run_batch()
+        return future.result()
+    
+    def _run_batch(self) -> None:
+        # Items are only taken under _leader and always resolved before it is released,
+        # so the caller's own request is still queued here
+        batch = [self._pending.get_nowait()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._pending.get(timeout=remaining) if remaining > 0 else self._pending.get_nowait())
+            except queue.Empty:
+                break
+        
+        texts = [text for text, _ in batch]
+        try:
+            embeddings = self._model.encode(texts, convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False).tolist()
+        except BaseException as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        
+        for (_, future), embedding in zip(batch, embeddings):
+            future.set_result(embedding)
+
+
+# One batcher per model and batch settings, so embed_text calls from VectorStore,
+# IngestionPipeline and AgentTools coalesce even though each builds its own service
+@lru_cache(maxsize=None)
+def _shared_batcher(model_name: str, max_batch_size: int, max_wait_ms: float) -> _RequestQueue:
+    return _RequestQueue(_load_model(model_name), max_batch_size, max_wait_ms)
+
+
+def shutdown_batchers() -> None:
+    with _model_lock:
+        _shared_batcher.cache_clear()
+
+
+# Every embedding (except the zero vector for empty text) is unit length, so squared L2
+# distance ranks exactly like cosine and dot similarity and consumers never re-normalize
 class EmbeddingService:
     
     def __init__(self, model_name: str = None):
         config = get_config()
         self.model_name = model_name or config.EMBEDDING_MODEL
         self._model = None
+        self._batch_max_size = config.EMBEDDING_BATCH_MAX_SIZE
+        self._batch_wait_ms = config.EMBEDDING_BATCH_WAIT_MS
         
         logger.info("embedding_service_initialized", model=self.model_name)
     
     @property
     def model(self) -> SentenceTransformer:
         if self._model is None:
-            logger.info("loading_embedding_model", model=self.model_name)
-            self._model = SentenceTransformer(self.model_name)
-            logger.info("embedding_model_loaded", model=self.model_name)
+            with _model_lock:
+                self._model = _load_model(self.model_name)
         
         return self._model
     
@@ -39,9 +116,15 @@ class EmbeddingService:
         
         logger.debug("generating_embedding", text_length=len(text))
         
-        embedding = self.model.encode(text, convert_to_numpy=True)
+        if self._batch_max_size <= 1:
+            return self.model.encode(text, convert_to_numpy=True, normalize_embeddings=True).tolist()
         
-        return embedding.tolist()
+        # Concurrent callers share one batched forward pass
+        return self._get_batcher().encode(text)
+    
+    def _get_batcher(self) -> _RequestQueue:
+        with _model_lock:
+            return _shared_batcher(self.model_name, self._batch_max_size, self._batch_wait_ms)
     
     def embed_batch(self, texts: List[str]) -> List[List[float]]:
         if not texts:
@@ -50,10 +133,30 @@ class EmbeddingService:
         
         logger.info("generating_batch_embeddings", count=len(texts))
         
-        embeddings = self.model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
+        embeddings = self.model.encode(texts, convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False)
         
         return embeddings.tolist()
     
+    def embed_texts(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.empty((0, self.get_embedding_dimension()), dtype=np.float32)
+        
+        logger.debug("generating_text_embeddings", count=len(texts))
+        
+        # One padded forward pass for the whole batch; rows stay aligned with texts
+        return self.model.encode(texts, convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False).astype(np.float32, copy=False)
+    
+    def embed_batch_int8(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.empty((0, self.get_embedding_dimension()), dtype=np.int8)
+        
+        logger.debug("generating_int8_embeddings", count=len(texts))
+        
+        # Unit-length vectors keep every component in [-1, 1], so one fixed 1/127 scale
+        # fits all rows and int8 dot products rank like cosine similarity
+        embeddings = self.model.encode(texts, convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False)
+        return np.clip(np.round(embeddings * 127.0), -128, 127).astype(np.int8)
+    
     def embed_document(self, document: str, chunk_size: int = None, chunk_overlap: int = None) -> List[List[float]]:
         config = get_config()
         chunk_size = chunk_size or config.CHUNK_SIZE
@@ -73,19 +176,9 @@ class EmbeddingService:
         if len(text) <= chunk_size:
             return [text]
         
-        chunks = []
-        start = 0
-        
-        while start < len(text):
-            end = start + chunk_size
-            chunk = text[start:end]
-            
-            if chunk.strip():
-                chunks.append(chunk)
-            
-            start += chunk_size - chunk_overlap
-        
-        return chunks
+        step = chunk_size - chunk_overlap
+        chunks = (text[start:start + chunk_size] for start in range(0, len(text), step))
+        return [chunk for chunk in chunks if not chunk.isspace()]
     
     def get_embedding_dimension(self) -> int:
         return self.model.get_sentence_embedding_dimension()
@@ -2,11 +2,14 @@
 Document ingestion pipeline orchestrator.
 """
 
+import os
 import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, List, Optional
+from secrets import token_hex
+from typing import Any, Dict, Iterator, List, Optional
 
-from src.core.aws_client import S3Client
+from src.core.aws_client import S3Client, get_s3_client
 from src.core.config import get_config
 from src.core.logging_setup import get_logger, set_correlation_id
 from src.memory.document_parser import DocumentParser
@@ -21,7 +24,7 @@ class IngestionPipeline:
     
     def __init__(self, s3_client: Optional[S3Client] = None, sanitizer: Optional[InputSanitizer] = None, parser: Optional[DocumentParser] = None, vector_store: Optional[VectorStore] = None, embedding_service: Optional[EmbeddingService] = None):
         self.config = get_config()
-        self.s3_client = s3_client or S3Client()
+        self.s3_client = s3_client or get_s3_client()
         self.sanitizer = sanitizer or InputSanitizer()
         self.parser = parser or DocumentParser()
         self.embedding_service = embedding_service or EmbeddingService()
@@ -32,7 +35,7 @@ class IngestionPipeline:
         logger.info("ingestion_pipeline_initialized")
     
     def ingest_file(self, file_path: str, metadata: Optional[Dict] = None) -> str:
-        correlation_id = str(uuid.uuid4())
+        correlation_id = token_hex(16)
         set_correlation_id(correlation_id)
         
         file_path = Path(file_path)
@@ -45,7 +48,17 @@ class IngestionPipeline:
         )
         
         try:
-            validation_result = self.sanitizer.validate_file(str(file_path))
+            # Missing paths, directories and FIFOs fail validation before anything is opened. One
+            # read of a regular file then feeds validation and metadata; it is hashed only when
+            # ClamAV will use the digest and the file can pass the size check.
+            probe = None
+            if file_path.is_file():
+                probe = self.parser.probe(
+                    str(file_path),
+                    hash_limit=self.sanitizer.max_size_bytes,
+                    hash_content=self.sanitizer.clamav_enabled
+                )
+            validation_result = self.sanitizer.validate_file(str(file_path), probe)
             if not validation_result.is_valid:
                 error_msg = f"File validation failed: {', '.join(validation_result.errors)}"
                 logger.error(
@@ -70,18 +83,17 @@ class IngestionPipeline:
             
             logger.info("file_quarantined", s3_uri=s3_uri)
             
-            text = self.parser.parse_file(str(file_path))
-            
-            if not text or len(text.strip()) == 0:
-                raise ValueError("No text content extracted from file")
-            
-            chunks = self.parser.chunk_text(
-                text,
+            # Chunks are cut while the parsed elements stream in; the full text is never joined
+            chunks = list(self.parser.chunk_stream(
+                self.parser.iter_text(str(file_path)),
                 chunk_size=self.config.CHUNK_SIZE,
                 chunk_overlap=self.config.CHUNK_OVERLAP
-            )
+            ))
+            
+            if not any(chunk.strip() for chunk in chunks):
+                raise ValueError("No text content extracted from file")
             
-            file_metadata = self.parser.extract_metadata(str(file_path))
+            file_metadata = self.parser.extract_metadata(str(file_path), probe)
             
             combined_metadata = {
                 "doc_id": doc_id,
@@ -92,26 +104,20 @@ class IngestionPipeline:
                 **(metadata or {})
             }
             
-            for i, chunk in enumerate(chunks):
-                chunk_id = f"{doc_id}_chunk_{i}"
-                chunk_metadata = {
-                    **combined_metadata,
-                    "chunk_index": i,
-                    "total_chunks": len(chunks)
-                }
-                
-                self.vector_store.add_document(
-                    chunk_id,
-                    chunk,
-                    chunk_metadata
-                )
+            # One forward pass and one table write for the whole document
+            total_chunks = len(chunks)
+            self.vector_store.add_documents(
+                [f"{doc_id}_chunk_{i}" for i in range(total_chunks)],
+                chunks,
+                [{"chunk_index": i} for i in range(total_chunks)],
+                shared_metadata={**combined_metadata, "total_chunks": total_chunks}
+            )
             
             logger.info(
                 "ingestion_completed",
                 doc_id=doc_id,
                 file=file_path.name,
-                chunks=len(chunks),
-                text_length=len(text)
+                chunks=len(chunks)
             )
             
             return doc_id
@@ -125,7 +131,62 @@ class IngestionPipeline:
             )
             raise
     
-    def ingest_directory(self, dir_path: str, recursive: bool = False, metadata: Optional[Dict] = None) -> List[str]:
+    def ingest_directory(self, dir_path: str, recursive: bool = False, metadata: Optional[Dict] = None, workers: Optional[int] = None) -> List[str]:
+        doc_ids = []
+        errors = []
+        
+        for result in self.iter_ingest_directory(dir_path, recursive=recursive, metadata=metadata, workers=workers):
+            if result["status"] == "success":
+                doc_ids.append(result["document_id"])
+            else:
+                errors.append({
+                    "file": result["file"],
+                    "error": result["error"]
+                })
+        
+        if errors:
+            logger.warning("ingestion_errors", errors=errors)
+        
+        return doc_ids
+    
+    def iter_ingest_directory(
+        self,
+        dir_path: str,
+        recursive: bool = False,
+        metadata: Optional[Dict] = None,
+        workers: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        # Yields one result per file as it finishes, so callers can report progress;
+        # with workers > 1, uploading and embedding one file overlaps parsing the next
+        workers = workers or self.config.INGEST_WORKERS
+        files = self._discover_files(dir_path, recursive)
+        successful = 0
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(files)))) as pool:
+            futures = {pool.submit(self.ingest_file, str(file_path), metadata): file_path for file_path in files}
+            for future in as_completed(futures):
+                file_path = futures[future]
+                try:
+                    doc_id = future.result()
+                except Exception as e:
+                    logger.error(
+                        "file_ingestion_failed",
+                        file=file_path.name,
+                        error=str(e)
+                    )
+                    yield {"file": str(file_path), "status": "failed", "error": str(e)}
+                else:
+                    successful += 1
+                    yield {"file": str(file_path), "status": "success", "document_id": doc_id}
+        
+        logger.info(
+            "directory_ingestion_completed",
+            total_files=len(files),
+            successful=successful,
+            failed=len(files) - successful
+        )
+    
+    def _discover_files(self, dir_path: str, recursive: bool) -> List[Path]:
         dir_path = Path(dir_path)
         
         if not dir_path.exists() or not dir_path.is_dir():
@@ -137,43 +198,20 @@ class IngestionPipeline:
             recursive=recursive
         )
         
-        pattern = "**/*" if recursive else "*"
-        files = [
-            f for f in dir_path.glob(pattern)
-            if f.is_file() and f.suffix in self.config.ALLOWED_EXTENSIONS
-        ]
+        # scandir reuses the dirent type, so only matching files become Path objects
+        allowed = frozenset(self.config.ALLOWED_EXTENSIONS)
+        files = []
+        pending = [str(dir_path)]
+        while pending:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    if recursive and entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif os.path.splitext(entry.name)[1] in allowed and entry.is_file():
+                        files.append(Path(entry.path))
         
         logger.info("files_found", count=len(files))
-        
-        doc_ids = []
-        errors = []
-        
-        for file_path in files:
-            try:
-                doc_id = self.ingest_file(str(file_path), metadata)
-                doc_ids.append(doc_id)
-            except Exception as e:
-                logger.error(
-                    "file_ingestion_failed",
-                    file=file_path.name,
-                    error=str(e)
-                )
-                errors.append({
-                    "file": str(file_path),
-                    "error": str(e)
-                })
-        
-        logger.info(
-            "directory_ingestion_completed",
-            total_files=len(files),
-            successful=len(doc_ids),
-            failed=len(errors)
-        )
-        
-        if errors:
-            logger.warning("ingestion_errors", errors=errors)
-        
-        return doc_ids
+        return files
     
     def get_ingestion_status(self, doc_id: str) -> Optional[Dict]:
         chunk_id = f"{doc_id}_chunk_0"
@@ -2,8 +2,11 @@
 Input sanitizer for validating and securing file uploads.
 """
 
+import hashlib
 import os
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import List, Optional
@@ -12,6 +15,8 @@ import magic
 
 from src.core.config import get_config
 from src.core.logging_setup import get_logger
+from src.memory.document_parser import FileProbe
+from src.memory.query_cache import QueryCache
 
 logger = get_logger(__name__)
 
@@ -22,6 +27,17 @@ except ImportError:
     CLAMAV_AVAILABLE = False
     logger.warning("clamd not installed - malware scanning disabled. Install: pip install clamd")
 
+# clamd's default StreamMaxLength; larger INSTREAM uploads are cut off by the daemon
+_INSTREAM_MAX_BYTES = 25 * 1024 * 1024
+
+_TRAVERSAL = ('../', '..\\', '%2e%2e', '....')
+
+_UNSAFE_FILENAME_CHARS = re.compile(r'[^\w\s\-\.]')
+_DOT_RUNS = re.compile(r'\.+')
+
+_SCAN_CACHE_MAX_ENTRIES = 1024
+_SCAN_CACHE_TTL_SECONDS = 3600
+
 
 @dataclass
 class ValidationResult:
@@ -43,6 +59,9 @@ class InputSanitizer:
         self.allowed_mime_types = set(self.config.ALLOWED_MIME_TYPES)
         self.clamav_enabled = self.config.ENABLE_CLAMAV and CLAMAV_AVAILABLE
         self.clamav_client = None
+        self.clamav_instream_only = self.config.CLAMAV_USE_INSTREAM
+        self._local = threading.local()
+        self._scan_cache = QueryCache(max_entries=_SCAN_CACHE_MAX_ENTRIES, ttl_seconds=_SCAN_CACHE_TTL_SECONDS)
         
         if self.clamav_enabled:
             try:
@@ -60,7 +79,7 @@ class InputSanitizer:
             clamav_enabled=self.clamav_enabled
         )
     
-    def validate_file(self, file_path: str) -> ValidationResult:
+    def validate_file(self, file_path: str, probe: Optional[FileProbe] = None) -> ValidationResult:
         errors = []
         warnings = []
         
@@ -76,7 +95,8 @@ class InputSanitizer:
             errors.append(f"Path is not a file: {file_path}")
             return ValidationResult(False, errors, warnings)
         
-        if not self._check_size(file_path):
+        size = probe.size if probe is not None else file_path.stat().st_size
+        if not self._check_size(file_path, size):
             errors.append(
                 f"File exceeds maximum size of {self.config.MAX_FILE_SIZE_MB}MB"
             )
@@ -85,7 +105,7 @@ class InputSanitizer:
         if not ext_valid:
             errors.append(ext_msg)
         
-        mime_valid, mime_msg = self._check_mime_type(file_path)
+        mime_valid, mime_msg = self._check_mime_type(file_path, probe.mime_type if probe else None)
         if not mime_valid:
             errors.append(mime_msg)
         elif mime_msg:
@@ -95,7 +115,13 @@ class InputSanitizer:
             errors.append("Filename contains path traversal patterns")
         
         if self.clamav_enabled:
-            malware_safe, malware_msg = self._scan_malware(file_path)
+            # Oversized files are rejected anyway, so they are not hashed just for the verdict
+            # cache; this mirrors the hash_limit ingestion passes to DocumentParser.probe
+            if probe is not None:
+                digest = probe.sha256
+            else:
+                digest = self._content_digest(file_path) if size <= self.max_size_bytes else None
+            malware_safe, malware_msg = self._scan_malware(file_path, size, digest)
             if not malware_safe:
                 errors.append(malware_msg)
         else:
@@ -114,8 +140,18 @@ class InputSanitizer:
         
         return ValidationResult(is_valid, errors, warnings)
     
-    def _check_size(self, file_path: Path) -> bool:
-        size = file_path.stat().st_size
+    def validate_files(self, paths: List[str], workers: int = 8) -> List[ValidationResult]:
+        # Results keep the order of paths; clamd serves concurrent connections in parallel
+        # and every worker thread has its own libmagic handle
+        if workers <= 1 or len(paths) <= 1:
+            return [self.validate_file(path) for path in paths]
+        
+        with ThreadPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+            return list(pool.map(self.validate_file, paths))
+    
+    def _check_size(self, file_path: Path, size: Optional[int] = None) -> bool:
+        if size is None:
+            size = file_path.stat().st_size
         
         if size > self.max_size_bytes:
             logger.warning(
@@ -136,10 +172,10 @@ class InputSanitizer:
         
         return True, ""
     
-    def _check_mime_type(self, file_path: Path) -> tuple[bool, Optional[str]]:
+    def _check_mime_type(self, file_path: Path, mime_type: Optional[str] = None) -> tuple[bool, Optional[str]]:
         try:
-            mime = magic.Magic(mime=True)
-            mime_type = mime.from_file(str(file_path))
+            if mime_type is None:
+                mime_type = self._magic().from_file(str(file_path))
             
             if mime_type not in self.allowed_mime_types:
                 logger.warning(
@@ -161,6 +197,13 @@ class InputSanitizer:
             logger.error("mime_check_failed", file=file_path.name, error=str(e))
             return False, f"MIME type check failed: {e}"
     
+    def _magic(self) -> magic.Magic:
+        # The magic database is loaded once per validating thread; handles are not shared
+        mime = getattr(self._local, "mime", None)
+        if mime is None:
+            mime = self._local.mime = magic.Magic(mime=True)
+        return mime
+    
     def _get_expected_mime(self, extension: str) -> Optional[str]:
         mime_map = {
             '.pdf': 'application/pdf',
@@ -172,48 +215,71 @@ class InputSanitizer:
         }
         return mime_map.get(extension.lower())
     
-    def _scan_malware(self, file_path: Path) -> tuple[bool, str]:
+    def _scan_malware(self, file_path: Path, size: Optional[int] = None, digest: Optional[str] = None) -> tuple[bool, str]:
+        # Verdicts are reused for identical content; only definitive ones are cached and
+        # they expire so signature updates are picked up
+        cache_key = (size, digest) if digest and size is not None else None
+        if cache_key is not None:
+            cached = self._scan_cache.get(cache_key)
+            if cached is not None:
+                logger.debug("malware_scan_cache_hit", file=file_path.name)
+                return cached
+        
         try:
-            scan_result = self.clamav_client.scan(str(file_path))
-            
-            if scan_result is None:
-                logger.info("malware_scan_clean", file=file_path.name)
-                return True, ""
-            
-            for file, result in scan_result.items():
-                status, virus_name = result
-                if status == "FOUND":
-                    logger.error(
-                        "malware_detected",
-                        file=file_path.name,
-                        virus=virus_name
-                    )
-                    return False, f"Malware detected: {virus_name}"
-            
-            return True, ""
+            if size is None:
+                size = file_path.stat().st_size
             
+            # Streaming the bytes spares clamd a path lookup and works without a shared
+            # filesystem; files beyond clamd's stream limit fall back to a path scan unless
+            # clamd cannot open our paths, in which case it reports the limit as an error
+            if size <= _INSTREAM_MAX_BYTES or self.clamav_instream_only:
+                with open(file_path, 'rb') as f:
+                    scan_result = self.clamav_client.instream(f)
+            else:
+                scan_result = self.clamav_client.scan(str(file_path))
+        
         except Exception as e:
             logger.error("malware_scan_failed", file=file_path.name, error=str(e))
             return False, f"Malware scan failed: {e}"
+        
+        verdict = (True, "")
+        for status, detail in (scan_result or {}).values():
+            if status == "FOUND":
+                logger.error(
+                    "malware_detected",
+                    file=file_path.name,
+                    virus=detail
+                )
+                verdict = (False, f"Malware detected: {detail}")
+                break
+            if status == "ERROR":
+                logger.error("malware_scan_failed", file=file_path.name, error=detail)
+                return False, f"Malware scan failed: {detail}"
+        
+        if verdict[0]:
+            logger.info("malware_scan_clean", file=file_path.name)
+        if cache_key is not None:
+            self._scan_cache.put(cache_key, verdict)
+        return verdict
+    
+    def _content_digest(self, file_path: Path) -> str:
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(64 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
     
     def _check_path_traversal(self, filename: str) -> bool:
-        traversal_patterns = ['../', '..\\', '%2e%2e', '....']
-        
         filename_lower = filename.lower()
-        
-        for pattern in traversal_patterns:
-            if pattern in filename_lower:
-                return True
-        
-        return False
+        return any(pattern in filename_lower for pattern in _TRAVERSAL)
     
     def sanitize_filename(self, filename: str) -> str:
-        filename = os.path.basename(filename)
-        filename = re.sub(r'[^\w\s\-\.]', '_', filename)
-        filename = re.sub(r'\.+', '.', filename)
-        filename = filename[:255]
-        logger.debug("filename_sanitized", original=filename, sanitized=filename)
-        return filename
+        sanitized = os.path.basename(filename)
+        sanitized = _UNSAFE_FILENAME_CHARS.sub('_', sanitized)
+        sanitized = _DOT_RUNS.sub('.', sanitized)
+        sanitized = sanitized[:255]
+        logger.debug("filename_sanitized", original=filename, sanitized=sanitized)
+        return sanitized
     
     def check_size_before_upload(self, file_path: str) -> bool:
         return self._check_size(Path(file_path))
@@ -2,20 +2,76 @@
 Vector store for document embeddings using LanceDB.
 """
 
+import json
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 import lancedb
+import numpy as np
 import pyarrow as pa
 
 from src.core.config import get_config
 from src.core.logging_setup import get_logger
 from src.memory.embeddings import EmbeddingService
+from src.memory.query_cache import QueryCache
 
 logger = get_logger(__name__)
 
+try:
+    import simsimd
+    SIMSIMD_AVAILABLE = True
+except ImportError:
+    SIMSIMD_AVAILABLE = False
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+    
+    def _json_dumps(value: Any) -> str:
+        # The metadata column is pa.string(); non-str keys are coerced as json.dumps would
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+except ImportError:
+    _json_loads = json.loads
+    _json_dumps = json.dumps
+
+
+def _squared_l2(queries: np.ndarray, corpus: np.ndarray) -> np.ndarray:
+    # Squared L2 matches LanceDB's default metric, so scores line up with search()
+    if SIMSIMD_AVAILABLE:
+        return np.asarray(simsimd.cdist(queries, corpus, metric="sqeuclidean"))
+    
+    return (
+        np.einsum("ij,ij->i", queries, queries)[:, None]
+        - 2.0 * (queries @ corpus.T)
+        + np.einsum("ij,ij->i", corpus, corpus)[None, :]
+    )
+
+
+def _quantize_int8(vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    # Symmetric per-vector scale: v ~= int8 * scale
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+
+
+def _serialize_metadata(metadatas: List[Dict[str, Any]], shared: Optional[Dict[str, Any]]) -> List[str]:
+    # Per-row keys override shared ones, so every stored object has unique keys
+    if not shared:
+        return [_json_dumps(metadata) for metadata in metadatas]
+    return [_json_dumps({**shared, **metadata}) for metadata in metadatas]
+
+
+# Everything a caller sees; the embedding column stays in LanceDB
+_RESULT_COLUMNS = ["id", "text", "metadata", "timestamp"]
+
+
+def _id_filter(doc_id: str) -> str:
+    # LanceDB's where() takes no bind parameters: quote as an SQL string literal,
+    # doubling embedded single quotes so an id cannot extend the predicate
+    return "id = '" + doc_id.replace("'", "''") + "'"
 
 class VectorStore:
     
@@ -24,10 +80,25 @@ class VectorStore:
         self.db_path = db_path or config.LANCEDB_PATH
         self.table_name = table_name
         self.embedding_service = embedding_service or EmbeddingService()
+        self.int8_search = config.VECTOR_INT8_SEARCH and SIMSIMD_AVAILABLE
+        self.rerank_candidates = config.VECTOR_RERANK_CANDIDATES
+        self.storage_dtype = config.VECTOR_STORAGE_DTYPE
+        self._write_listeners: List[Callable[[], None]] = []
+        self._corpus: Optional[Dict[str, Any]] = None
+        # Query embeddings depend only on the text, so writes never invalidate them
+        self._query_embeddings = QueryCache(max_entries=config.QUERY_CACHE_MAX_ENTRIES, ttl_seconds=float("inf"))
         
         Path(self.db_path).mkdir(parents=True, exist_ok=True)
         
-        self.db = lancedb.connect(self.db_path)
+        try:
+            # A zero interval makes every read on the cached handle pick up the latest version,
+            # so writes through other VectorStore instances and processes are seen
+            self.db = lancedb.connect(self.db_path, read_consistency_interval=timedelta(0))
+            self._reopen_for_reads = False
+        except TypeError:
+            # Releases without the option only see other writers through a fresh open_table
+            self.db = lancedb.connect(self.db_path)
+            self._reopen_for_reads = True
         self._ensure_table()
         
         logger.info(
@@ -43,7 +114,7 @@ class VectorStore:
             schema = pa.schema([
                 pa.field("id", pa.string()),
                 pa.field("text", pa.string()),
-                pa.field("embedding", pa.list_(pa.float32(), embedding_dim)),
+                pa.field("embedding", pa.list_(pa.from_numpy_dtype(np.dtype(self.storage_dtype)), embedding_dim)),
                 pa.field("metadata", pa.string()),
                 pa.field("timestamp", pa.string()),
             ])
@@ -51,95 +122,270 @@ class VectorStore:
             self.db.create_table(self.table_name, schema=schema)
             
             logger.info("vector_table_created", table=self.table_name)
+        
+        # One handle for the life of the store; reads go through _read_table
+        self._table = self.db.open_table(self.table_name)
+        self._schema = self._table.schema
+        # Writes follow the stored element type, so float32 tables stay readable after a config change
+        self._vector_dtype = self._schema.field("embedding").type.value_type.to_pandas_dtype()
+        self._ensure_id_index()
+    
+    def _ensure_id_index(self) -> None:
+        # Lance cannot index an empty table, so a new store gets its index on the next open;
+        # rows written after the index is built are still found by a scan of the new fragments
+        if self._table.count_rows() == 0:
+            return
+        
+        try:
+            self._table.create_scalar_index("id", replace=False)
+            logger.info("vector_id_index_created", table=self.table_name)
+        except Exception as e:
+            logger.debug("vector_id_index_skipped", table=self.table_name, error=str(e))
+    
+    def add_write_listener(self, callback: Callable[[], None]) -> None:
+        self._write_listeners.append(callback)
+    
+    def _notify_write(self) -> None:
+        self._corpus = None
+        for callback in self._write_listeners:
+            callback()
+    
+    def _read_table(self):
+        if self._reopen_for_reads:
+            self._table = self.db.open_table(self.table_name)
+        return self._table
+    
+    def corpus_version(self) -> Optional[int]:
+        # LanceDB bumps the table version on every write, so it is stable across processes
+        return getattr(self._read_table(), "version", None)
     
     def add_document(self, doc_id: str, text: str, metadata: Optional[Dict[str, Any]] = None) -> None:
-        import json
-        
         logger.info("adding_document", doc_id=doc_id, text_length=len(text))
         
         embedding = self.embedding_service.embed_text(text)
         
-        table = self.db.open_table(self.table_name)
+        table = self._table
         
         data = [{
             "id": doc_id,
             "text": text,
             "embedding": embedding,
-            "metadata": json.dumps(metadata or {}),
+            "metadata": _json_dumps(metadata or {}),
             "timestamp": datetime.utcnow().isoformat()
         }]
         
         table.add(data)
+        self._notify_write()
         
         logger.info("document_added", doc_id=doc_id)
     
-    def add_documents_batch(self, documents: List[Dict[str, Any]]) -> None:
-        import json
+    def add_documents(
+        self,
+        ids: List[str],
+        texts: List[str],
+        metadatas: List[Dict[str, Any]],
+        embeddings: Optional[np.ndarray] = None,
+        shared_metadata: Optional[Dict[str, Any]] = None
+    ) -> None:
+        if not ids:
+            return
+        
+        logger.info("adding_documents", count=len(ids))
+        
+        if embeddings is None:
+            embeddings = self._embed_unique(texts)
+        data = self._arrow_rows(ids, texts, embeddings, _serialize_metadata(metadatas, shared_metadata))
+        
+        table = self._table
+        table.add(data)
+        self._notify_write()
         
+        logger.info("documents_added", count=len(ids))
+    
+    def add_documents_batch(self, documents: List[Dict[str, Any]]) -> None:
         logger.info("adding_documents_batch", count=len(documents))
         
-        texts = [doc["text"] for doc in documents]
-        embeddings = self.embedding_service.embed_batch(texts)
-        
-        table = self.db.open_table(self.table_name)
+        if not documents:
+            return
         
-        data = []
-        for doc, embedding in zip(documents, embeddings):
-            data.append({
-                "id": doc.get("doc_id", str(uuid.uuid4())),
-                "text": doc["text"],
-                "embedding": embedding,
-                "metadata": json.dumps(doc.get("metadata", {})),
-                "timestamp": datetime.utcnow().isoformat()
-            })
+        ids = [doc.get("doc_id", str(uuid.uuid4())) for doc in documents]
+        texts = [doc["text"] for doc in documents]
+        metadata = [_json_dumps(doc.get("metadata", {})) for doc in documents]
+        data = self._arrow_rows(ids, texts, self._embed_unique(texts), metadata)
         
+        table = self._table
         table.add(data)
+        self._notify_write()
         
         logger.info("documents_batch_added", count=len(documents))
     
-    def search(self, query: str, limit: int = 5, filter_metadata: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
-        import json
-        
+    def _embed_unique(self, texts: List[str]) -> np.ndarray:
+        # Repeated chunks (headers, footers, boilerplate) go through the model once
+        index: Dict[str, int] = {}
+        inverse = [index.setdefault(text, len(index)) for text in texts]
+        if len(index) == len(texts):
+            return self.embedding_service.embed_texts(texts)
+        
+        return self.embedding_service.embed_texts(list(index))[inverse]
+    
+    def _arrow_rows(self, ids: List[str], texts: List[str], embeddings: np.ndarray, metadata: List[str]) -> pa.Table:
+        # Columnar rows for table.add(): the vectors go to LanceDB as one contiguous
+        # buffer rather than a Python list per row. A pa.Table (zero-copy over the
+        # arrays) is accepted by every lancedb release; a bare RecordBatch is not
+        vectors = np.ascontiguousarray(embeddings, dtype=self._vector_dtype)
+        timestamp = datetime.utcnow().isoformat()
+        
+        return pa.Table.from_arrays([
+            pa.array(ids, pa.string()),
+            pa.array(texts, pa.string()),
+            pa.FixedSizeListArray.from_arrays(pa.array(vectors.ravel()), vectors.shape[1]),
+            pa.array(metadata, pa.string()),
+            pa.array([timestamp] * len(ids), pa.string()),
+        ], schema=self._schema)
+    
+    def search(
+        self,
+        query: str,
+        limit: int = 5,
+        filter_metadata: Optional[Dict[str, Any]] = None,
+        query_embedding: Optional[List[float]] = None
+    ) -> List[Dict[str, Any]]:
+        return self.search_with_version(query, limit, filter_metadata, query_embedding)[0]
+    
+    def search_with_version(
+        self,
+        query: str,
+        limit: int = 5,
+        filter_metadata: Optional[Dict[str, Any]] = None,
+        query_embedding: Optional[List[float]] = None
+    ) -> tuple[List[Dict[str, Any]], Optional[int]]:
+        # The version is read before the search, so results are never older than the version
+        # they are reported with; callers key persistent caches on it
         logger.info("searching_documents", query_length=len(query), limit=limit)
         
-        query_embedding = self.embedding_service.embed_text(query)
+        if query_embedding is None:
+            query_embedding = self._query_embeddings.get(query)
+            if query_embedding is None:
+                query_embedding = self.embedding_service.embed_text(query)
+                self._query_embeddings.put(query, query_embedding)
         
-        table = self.db.open_table(self.table_name)
+        table = self._read_table()
+        version = getattr(table, "version", None)
         
+        # Project away the embedding column and read the hits column-wise
         results = (
             table.search(query_embedding)
+            .select(_RESULT_COLUMNS)
             .limit(limit)
-            .to_list()
+            .to_arrow()
+            .to_pydict()
         )
+        distances = results.get("_distance") or [0.0] * len(results["id"])
         
-        parsed_results = []
-        for result in results:
-            parsed_results.append({
-                "id": result["id"],
-                "text": result["text"],
-                "metadata": json.loads(result["metadata"]),
-                "timestamp": result["timestamp"],
-                "score": float(result.get("_distance", 0))
-            })
+        parsed_results = [{
+            "id": doc_id,
+            "text": text,
+            "metadata": _json_loads(metadata),
+            "timestamp": timestamp,
+            "score": float(distance)
+        } for doc_id, text, metadata, timestamp, distance in zip(
+            results["id"], results["text"], results["metadata"], results["timestamp"], distances
+        )]
         
         logger.info("search_completed", results_count=len(parsed_results))
         
-        return parsed_results
+        return parsed_results, version
+    
+    def search_batch(self, query_embeddings: np.ndarray, limit: int = 5) -> List[List[Dict[str, Any]]]:
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        logger.info("searching_documents_batch", query_count=len(queries), limit=limit)
+        
+        corpus = self._load_corpus()
+        if corpus is None or len(queries) == 0:
+            return [[] for _ in range(len(queries))]
+        
+        ids, texts, metadata, timestamps = corpus["ids"], corpus["texts"], corpus["metadata"], corpus["timestamps"]
+        
+        batch_results = []
+        for ordered, distances in self._rank(queries, corpus, min(limit, len(ids))):
+            batch_results.append([{
+                "id": ids[i],
+                "text": texts[i],
+                "metadata": _json_loads(metadata[i]),
+                "timestamp": timestamps[i],
+                "score": float(distance)
+            } for i, distance in zip(ordered, distances)])
+        
+        logger.info("search_batch_completed", query_count=len(queries))
+        
+        return batch_results
+    
+    def _rank(self, queries: np.ndarray, corpus: Dict[str, Any], k: int) -> List[tuple[np.ndarray, np.ndarray]]:
+        embeddings = corpus["embeddings"]
+        candidate_count = max(k, self.rerank_candidates)
+        
+        if "int8" not in corpus or candidate_count >= len(embeddings):
+            distances = _squared_l2(queries, embeddings)
+            candidates = np.argpartition(distances, k - 1, axis=1)[:, :k]
+            candidate_distances = np.take_along_axis(distances, candidates, axis=1)
+        else:
+            # Coarse pass on int8 codes, then exact float32 distances for the shortlist only
+            query_codes, query_scales = _quantize_int8(queries)
+            dots = np.asarray(simsimd.cdist(query_codes, corpus["int8"], metric="dot"))
+            approx = (
+                np.einsum("ij,ij->i", queries, queries)[:, None]
+                - 2.0 * dots * query_scales[:, None] * corpus["scales"][None, :]
+                + corpus["sq_norms"][None, :]
+            )
+            candidates = np.argpartition(approx, candidate_count - 1, axis=1)[:, :candidate_count]
+            candidate_distances = ((embeddings[candidates] - queries[:, None, :]) ** 2).sum(axis=2)
+        
+        ranked = []
+        for row in range(len(queries)):
+            order = np.argsort(candidate_distances[row])[:k]
+            ranked.append((candidates[row, order], candidate_distances[row, order]))
+        return ranked
+    
+    def _load_corpus(self) -> Optional[Dict[str, Any]]:
+        # Keep the stored vectors as one contiguous matrix until the table changes
+        table = self._read_table()
+        version = getattr(table, "version", None)
+        if self._corpus is not None and version is not None and self._corpus["version"] == version:
+            return self._corpus
+        
+        data = table.to_arrow()
+        if data.num_rows == 0:
+            self._corpus = None
+            return None
+        
+        embeddings = data.column("embedding").combine_chunks().flatten().to_numpy().reshape(data.num_rows, -1)
+        self._corpus = {
+            "version": version,
+            "embeddings": np.ascontiguousarray(embeddings, dtype=np.float32),
+            "ids": data.column("id").to_pylist(),
+            "texts": data.column("text").to_pylist(),
+            "metadata": data.column("metadata").to_pylist(),
+            "timestamps": data.column("timestamp").to_pylist(),
+        }
+        
+        if self.int8_search:
+            self._corpus["int8"], self._corpus["scales"] = _quantize_int8(self._corpus["embeddings"])
+            self._corpus["sq_norms"] = np.einsum("ij,ij->i", self._corpus["embeddings"], self._corpus["embeddings"])
+        return self._corpus
     
     def delete_document(self, doc_id: str) -> None:
         logger.info("deleting_document", doc_id=doc_id)
         
-        table = self.db.open_table(self.table_name)
-        table.delete(f'id = "{doc_id}"')
+        table = self._table
+        table.delete(_id_filter(doc_id))
+        self._notify_write()
         
         logger.info("document_deleted", doc_id=doc_id)
     
     def get_document(self, doc_id: str) -> Optional[Dict[str, Any]]:
-        import json
-        
-        table = self.db.open_table(self.table_name)
+        table = self._read_table()
         
-        results = table.search().where(f'id = "{doc_id}"').limit(1).to_list()
+        results = table.search().where(_id_filter(doc_id)).select(_RESULT_COLUMNS).limit(1).to_list()
         
         if not results:
             return None
@@ -148,12 +394,12 @@ class VectorStore:
         return {
             "id": result["id"],
             "text": result["text"],
-            "metadata": json.loads(result["metadata"]),
+            "metadata": _json_loads(result["metadata"]),
             "timestamp": result["timestamp"]
         }
     
     def get_stats(self) -> Dict[str, Any]:
-        table = self.db.open_table(self.table_name)
+        table = self._read_table()
         
         count = table.count_rows()
         
@@ -172,5 +418,6 @@ class VectorStore:
         
         self.db.drop_table(self.table_name)
         self._ensure_table()
+        self._notify_write()
         
         logger.info("vector_store_cleared", table=self.table_name)
@@ -1,3 +1,4 @@
+import threading
 import time
 from datetime import datetime
 from typing import Any
@@ -91,10 +92,16 @@ class MetricsCollector:
             registry=self.registry
         )
         
+        # Running totals for get_summary, so a summary never walks the labelled children
+        self._totals = {"requests": 0, "guardrail_blocks": 0, "sandbox_executions": 0, "active_sessions": 0}
+        self._totals_lock = threading.Lock()
+        
         logger.info("metrics_collector_initialized")
     
     def record_request(self, status: str):
         self.requests_total.labels(status=status).inc()
+        with self._totals_lock:
+            self._totals["requests"] += 1
     
     def record_request_duration(self, operation: str, duration: float):
         self.request_duration.labels(operation=operation).observe(duration)
@@ -104,12 +111,16 @@ class MetricsCollector:
     
     def record_guardrail_block(self, violation_type: str):
         self.guardrail_blocks.labels(violation_type=violation_type).inc()
+        with self._totals_lock:
+            self._totals["guardrail_blocks"] += 1
     
     def record_approval_request(self, risk_level: str, decision: str):
         self.approval_requests.labels(risk_level=risk_level, decision=decision).inc()
     
     def record_sandbox_execution(self, language: str, success: bool):
         self.sandbox_executions.labels(language=language, success=str(success)).inc()
+        with self._totals_lock:
+            self._totals["sandbox_executions"] += 1
     
     def record_code_analyzer_block(self, violation_type: str):
         self.code_analyzer_blocks.labels(violation_type=violation_type).inc()
@@ -119,6 +130,8 @@ class MetricsCollector:
     
     def set_active_sessions(self, count: int):
         self.active_sessions.set(count)
+        with self._totals_lock:
+            self._totals["active_sessions"] = count
     
     def record_vector_search_duration(self, duration: float):
         self.vector_search_duration.observe(duration)
@@ -133,28 +146,29 @@ class MetricsCollector:
         return generate_latest(self.registry)
     
     def get_summary(self) -> dict[str, Any]:
+        with self._totals_lock:
+            totals = dict(self._totals)
+        
         summary = {
             "timestamp": datetime.utcnow().isoformat(),
             "requests": {
-                "total": self.requests_total._value.get() if hasattr(self.requests_total, "_value") else 0,
+                "total": totals["requests"],
             },
             "guardrails": {
-                "blocks": sum(self.guardrail_blocks._metrics.values()) if hasattr(self.guardrail_blocks, "_metrics") else 0,
+                "blocks": totals["guardrail_blocks"],
             },
             "sandbox": {
-                "executions": sum(self.sandbox_executions._metrics.values()) if hasattr(self.sandbox_executions, "_metrics") else 0,
+                "executions": totals["sandbox_executions"],
             },
-            "active_sessions": self.active_sessions._value.get() if hasattr(self.active_sessions, "_value") else 0,
+            "active_sessions": totals["active_sessions"],
         }
         
         return summary
 
-_metrics_collector: MetricsCollector | None = None
+# Built at import so concurrent first callers cannot each create a registry and split the counts
+_metrics_collector = MetricsCollector()
 
 def get_metrics_collector() -> MetricsCollector:
-    global _metrics_collector
-    if _metrics_collector is None:
-        _metrics_collector = MetricsCollector()
     return _metrics_collector
 
 class MetricsTimer:
@@ -164,10 +178,10 @@ class MetricsTimer:
         self.start_time = None
     
     def __enter__(self):
-        self.start_time = time.time()
+        self.start_time = time.perf_counter_ns()
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
         if self.start_time is not None:
-            duration = time.time() - self.start_time
+            duration = (time.perf_counter_ns() - self.start_time) * 1e-9
             self.metrics_collector.record_request_duration(self.operation, duration)
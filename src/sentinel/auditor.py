@@ -1,14 +1,21 @@
+import re
 import uuid
 from datetime import datetime
 from typing import Any
 from enum import Enum
 from src.core.config import Config
 from src.core.logging_setup import get_logger
-from src.core.aws_client import CloudWatchClient
+from src.core.aws_client import get_cloudwatch_client
 from src.agent.state import Task, RiskLevel
+from src.agent.tool_registry import TOOL_SPECS
 
 logger = get_logger(__name__)
 
+# CRITICAL: Destructive operations that delete/overwrite data
+_DESTRUCTIVE_COMMAND_RE = re.compile(
+    r'\brm\s+|\bunlink\s+|\bdd\s+|\bshred\s+|\b>\s*/|\btruncate\s+|\bmkfs\.|\bformat\b|\bwipefs\b'
+)
+
 class AuditAction(str, Enum):
     APPROVE = "approve"
     DENY = "deny"
@@ -30,7 +37,7 @@ class AuditLog:
 class Auditor:
     def __init__(self, config: Config | None = None):
         self.config = config or Config()
-        self.cloudwatch = CloudWatchClient()
+        self.cloudwatch = get_cloudwatch_client()
         self.pending_approvals: dict[str, AuditLog] = {}
         self.audit_history: list[AuditLog] = []
         
@@ -55,11 +62,12 @@ class Auditor:
     def assess_task_risk(self, task: Task) -> tuple[RiskLevel, str]:
         logger.info("assessing_task_risk", task_id=task.id, tool=task.tool)
         
-        risk_level = task.risk_level
+        # Every tool carries a risk floor in the registry; the checks below only escalate
+        spec = TOOL_SPECS.get(task.tool)
+        risk_level = max(task.risk_level, spec.default_risk) if spec else task.risk_level
         risk_factors = []
         
         if task.tool == "code_execution":
-            risk_level = max(risk_level, RiskLevel.HIGH)
             risk_factors.append("code_execution_enabled")
             
             code = task.tool_input.get("code", "")
@@ -68,7 +76,6 @@ class Auditor:
                 risk_factors.append("dangerous_code_patterns")
         
         if task.tool == "file_write":
-            risk_level = max(risk_level, RiskLevel.MEDIUM)
             risk_factors.append("filesystem_modification")
             
             path = task.tool_input.get("path", "")
@@ -77,19 +84,12 @@ class Auditor:
                 risk_factors.append("sensitive_file_modification")
         
         if task.tool == "web_search":
-            risk_level = max(risk_level, RiskLevel.MEDIUM)
             risk_factors.append("external_network_access")
         
         if task.tool == "bash_command":
             command = task.tool_input.get("command", "")
             
-            # CRITICAL: Destructive operations that delete/overwrite data
-            destructive_patterns = [
-                r'\brm\s+', r'\bunlink\s+', r'\bdd\s+', r'\bshred\s+',
-                r'\b>\s*/', r'\btruncate\s+', r'\bmkfs\.',
-                r'\bformat\b', r'\bwipefs\b'
-            ]
-            if any(__import__('re').search(pattern, command) for pattern in destructive_patterns):
+            if _DESTRUCTIVE_COMMAND_RE.search(command):
                 risk_level = RiskLevel.CRITICAL
                 risk_factors.append("destructive_operation")
             
@@ -119,15 +119,12 @@ class Auditor:
                 risk_factors.append("shell_command_execution")
         
         if task.tool == "screenshot":
-            risk_level = max(risk_level, RiskLevel.LOW)
             risk_factors.append("screen_capture")
         
         if task.tool in ["mouse_move", "mouse_click"]:
-            risk_level = max(risk_level, RiskLevel.MEDIUM)
             risk_factors.append("mouse_control")
         
         if task.tool in ["keyboard_type", "keyboard_press", "keyboard_hotkey"]:
-            risk_level = max(risk_level, RiskLevel.MEDIUM)
             risk_factors.append("keyboard_control")
             
             text = task.tool_input.get("text", "")
@@ -143,17 +140,7 @@ class Auditor:
 
     def requires_approval(self, task: Task) -> bool:
         risk_level, _ = self.assess_task_risk(task)
-        
-        # Compare task risk level with configured threshold
-        # Risk levels: LOW < MEDIUM < HIGH < CRITICAL
-        risk_order = {
-            RiskLevel.LOW: 0,
-            RiskLevel.MEDIUM: 1,
-            RiskLevel.HIGH: 2,
-            RiskLevel.CRITICAL: 3
-        }
-        
-        return risk_order[risk_level] >= risk_order[self.approval_threshold]
+        return risk_level >= self.approval_threshold
 
     def request_approval(self, task: Task, user_id: str = "default") -> AuditLog:
         logger.info("requesting_approval", task_id=task.id, tool=task.tool)
@@ -247,8 +234,8 @@ class Auditor:
                 log_event["decision_reason"] = audit_log.decision_reason
             
             self.cloudwatch.put_log_event(
-                log_group_name="/openaegis/audit",
-                log_stream_name="task-approvals",
+                log_group="/openaegis/audit",
+                log_stream="task-approvals",
                 message=str(log_event)
             )
             
@@ -0,0 +1,144 @@
+import atexit
+import json
+import os
+import queue
+import selectors
+import struct
+import subprocess
+import threading
+import time
+from typing import Any
+from src.core.logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+_HEADER = struct.Struct(">I")
+
+# Runs inside each worker. Requests and responses are length-prefixed JSON frames on
+# stdin and a private dup of stdout; fd 1 itself is pointed at stderr so user code
+# writing to it directly cannot corrupt the protocol stream.
+WORKER_SOURCE = r'''
+import io, json, os, struct, sys, traceback
+from contextlib import redirect_stderr, redirect_stdout
+HEADER = struct.Struct(">I")
+proto_in = sys.stdin.buffer
+proto_out = os.fdopen(os.dup(1), "wb")
+os.dup2(2, 1)
+
+def read_exact(n):
+    data = b""
+    while len(data) < n:
+        chunk = proto_in.read(n - len(data))
+        if not chunk:
+            sys.exit(0)
+        data += chunk
+    return data
+
+while True:
+    request = json.loads(read_exact(HEADER.unpack(read_exact(HEADER.size))[0]))
+    stdout, stderr = io.StringIO(), io.StringIO()
+    exit_code = 0
+    with redirect_stdout(stdout), redirect_stderr(stderr):
+        try:
+            exec(compile(request["code"], "<code_execution>", "exec"), {"__name__": "__main__"})
+        except SystemExit as e:
+            exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except BaseException:
+            traceback.print_exc()
+            exit_code = 1
+    payload = json.dumps({"stdout": stdout.getvalue(), "stderr": stderr.getvalue(), "exit_code": exit_code}).encode()
+    proto_out.write(HEADER.pack(len(payload)) + payload)
+    proto_out.flush()
+'''
+
+
+class _Worker:
+    def __init__(self, env: dict[str, str]):
+        self.process = subprocess.Popen(
+            ["python", "-u", "-c", WORKER_SOURCE],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env=env,
+        )
+
+    def run(self, code: str, timeout: float) -> dict[str, Any]:
+        payload = json.dumps({"code": code}).encode()
+        self.process.stdin.write(_HEADER.pack(len(payload)) + payload)
+        self.process.stdin.flush()
+
+        deadline = time.monotonic() + timeout
+        header = self._read_exact(_HEADER.size, deadline)
+        return json.loads(self._read_exact(_HEADER.unpack(header)[0], deadline))
+
+    def _read_exact(self, n: int, deadline: float) -> bytes:
+        fd = self.process.stdout.fileno()
+        data = bytearray()
+        with selectors.DefaultSelector() as selector:
+            selector.register(fd, selectors.EVENT_READ)
+            while len(data) < n:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not selector.select(remaining):
+                    raise TimeoutError
+                chunk = os.read(fd, n - len(data))
+                if not chunk:
+                    raise RuntimeError("Interpreter worker exited unexpectedly")
+                data += chunk
+        return bytes(data)
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.wait()
+
+
+class InterpreterPool:
+    def __init__(self, size: int, env: dict[str, str] | None = None):
+        self.size = size
+        self.env = env if env is not None else dict(os.environ)
+        self._idle: queue.Queue[_Worker] = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+
+        for _ in range(size):
+            self._idle.put(_Worker(self.env))
+
+        atexit.register(self.close)
+        logger.info("interpreter_pool_started", size=size)
+
+    def execute(self, code: str, timeout: float) -> dict[str, Any]:
+        worker = self._idle.get()
+        try:
+            result = worker.run(code, timeout)
+        except TimeoutError:
+            # A stuck worker cannot be interrupted safely; replace it
+            self._replace(worker)
+            raise TimeoutError(f"Code execution timed out after {timeout} seconds")
+        except Exception:
+            self._replace(worker)
+            raise
+
+        with self._lock:
+            if self._closed:
+                worker.kill()
+            else:
+                self._idle.put(worker)
+        return result
+
+    def _replace(self, worker: _Worker) -> None:
+        worker.kill()
+        with self._lock:
+            if not self._closed:
+                self._idle.put(_Worker(self.env))
+                logger.info("interpreter_worker_respawned")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+
+        while True:
+            try:
+                self._idle.get_nowait().kill()
+            except queue.Empty:
+                break
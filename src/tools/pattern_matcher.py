@@ -0,0 +1,59 @@
+import re
+import threading
+from typing import Sequence
+from src.core.logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
+# Below this size the regex scan finishes before Hyperscan's per-call setup pays off
+HYPERSCAN_MIN_LENGTH = 4096
+
+
+# Case-insensitive literal matcher: one regex alternation, plus a Hyperscan
+# database for large inputs when the library is installed
+class PatternMatcher:
+    def __init__(self, patterns: Sequence[str]):
+        self.patterns = tuple(patterns)
+        self._regex = re.compile("|".join(map(re.escape, self.patterns)), re.IGNORECASE)
+        self._database = None
+        self._local = threading.local()
+
+        if HYPERSCAN_AVAILABLE:
+            try:
+                database = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+                database.compile(
+                    expressions=[re.escape(p).encode() for p in self.patterns],
+                    ids=list(range(len(self.patterns))),
+                    flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH] * len(self.patterns),
+                )
+                self._database = database
+            except hyperscan.error as e:
+                logger.warning("hyperscan_compile_failed", error=str(e))
+
+    def search(self, text: str) -> str | None:
+        if self._database is None or len(text) < HYPERSCAN_MIN_LENGTH:
+            match = self._regex.search(text)
+            return match.group(0) if match else None
+
+        # Scratch space cannot be shared between concurrent scans
+        scratch = getattr(self._local, "scratch", None)
+        if scratch is None:
+            scratch = self._local.scratch = hyperscan.Scratch(self._database)
+
+        hits: list[int] = []
+
+        def on_match(pattern_id: int, start: int, end: int, flags: int, context: object) -> bool:
+            hits.append(pattern_id)
+            return True  # stop at the first hit
+
+        try:
+            self._database.scan(text.encode("utf-8", "surrogatepass"), match_event_handler=on_match, scratch=scratch)
+        except hyperscan.ScanTerminated:
+            pass
+        return self.patterns[hits[0]] if hits else None
@@ -62,6 +62,18 @@ class TestConfig:
         assert Path(test_config.LANCEDB_PATH).exists()
         assert Path(test_config.WORKSPACE_PATH).exists()
 
+class TestLoggingSetup:
+    """Test structlog processors."""
+
+    def test_mask_sensitive_data(self):
+        """Test that sensitive keys are masked regardless of case."""
+        from src.core.logging_setup import mask_sensitive_data
+        event = mask_sensitive_data(None, None, {"API_KEY": "sk-abcdef", "Password": "pw", "user": "alice"})
+
+        assert event["API_KEY"] == "***cdef"
+        assert event["Password"] == "****"
+        assert event["user"] == "alice"
+
 class TestEmbeddings:
     """Test embedding service."""
     
@@ -86,6 +98,20 @@ class TestEmbeddings:
         embedding = service.embed_text("")
         assert len(embedding) == 384
 
+    def test_embed_batch_int8(self):
+        """Test int8-quantized batch embedding."""
+        import numpy as np
+        service = EmbeddingService()
+        codes = service.embed_batch_int8(["Hello world", "Test text"])
+        assert codes.dtype == np.int8
+        assert codes.shape == (2, 384)
+
+    def test_services_share_batcher(self):
+        """Test embed_text batching is shared across services for one model."""
+        first, second = EmbeddingService(), EmbeddingService()
+        assert first._get_batcher() is second._get_batcher()
+        assert first.embed_text("Hello world") == second.embed_batch(["Hello world"])[0]
+
 class TestVectorStore:
     """Test vector store operations."""
     
@@ -119,6 +145,171 @@ class TestVectorStore:
         assert len(results) > 0
         assert "OpenAegis" in results[0]["content"]
 
+    def test_add_documents_bulk(self, temp_workspace):
+        """Test that a batch of chunks is embedded and stored in one call."""
+        store = VectorStore(db_path=str(temp_workspace / "lancedb"))
+        store.add_documents(
+            ["doc_chunk_0", "doc_chunk_1"],
+            ["OpenAegis sandboxes code", "Vector search over documents"],
+            [{"chunk_index": 0}, {"chunk_index": 1}]
+        )
+
+        assert store.get_stats()["document_count"] == 2
+        assert store.get_document("doc_chunk_1")["metadata"] == {"chunk_index": 1}
+
+    def test_search_reuses_query_embedding(self, temp_workspace, monkeypatch):
+        """Test that repeating a query does not embed it again."""
+        store = VectorStore(db_path=str(temp_workspace / "lancedb"))
+        store.add_documents(["doc_chunk_0"], ["OpenAegis sandboxes code"], [{}])
+        calls = []
+        embed_text = store.embedding_service.embed_text
+        monkeypatch.setattr(store.embedding_service, "embed_text", lambda text: calls.append(text) or embed_text(text))
+
+        store.search("sandbox")
+        store.search("sandbox")
+
+        assert calls == ["sandbox"]
+
+    def test_serialize_metadata_overrides_shared_keys(self):
+        """Test that a per-row key replaces the shared one instead of being duplicated."""
+        import json
+        from src.memory.vector_store import _serialize_metadata
+
+        rows = _serialize_metadata([{"chunk_index": 0, "source": "row"}, {}], {"source": "doc", "doc_id": "d1"})
+
+        assert rows[0].count('"source"') == 1
+        assert [json.loads(row) for row in rows] == [
+            {"source": "row", "doc_id": "d1", "chunk_index": 0},
+            {"source": "doc", "doc_id": "d1"},
+        ]
+
+    def test_id_filter_escapes_quotes(self):
+        """Test that a quote in a document id cannot break out of the predicate."""
+        from src.memory.vector_store import _id_filter
+
+        assert _id_filter("doc_chunk_0") == "id = 'doc_chunk_0'"
+        assert _id_filter("x' OR '1'='1") == "id = 'x'' OR ''1''=''1'"
+
+class TestDocumentParser:
+    """Test document probing and chunking."""
+
+    def test_probe_reads_size_type_and_hash(self, temp_workspace):
+        """Test that one probe yields size, MIME type and SHA-256."""
+        import hashlib
+        from src.memory.document_parser import DocumentParser
+        path = temp_workspace / "notes.txt"
+        path.write_text("OpenAegis notes\n" * 1000)
+
+        probe = DocumentParser().probe(str(path))
+
+        assert probe.size == path.stat().st_size
+        assert probe.mime_type == "text/plain"
+        assert probe.sha256 == hashlib.sha256(path.read_bytes()).hexdigest()
+        assert DocumentParser().probe(str(path), hash_limit=10).sha256 is None
+        assert DocumentParser().probe(str(path), hash_content=False).sha256 is None
+
+    def test_probe_rejects_non_regular_files(self, temp_workspace):
+        """Test that probing a directory or FIFO fails fast instead of reading it."""
+        from src.memory.document_parser import DocumentParser
+        fifo = temp_workspace / "pipe.txt"
+        os.mkfifo(fifo)
+
+        for path in (temp_workspace, fifo):
+            with pytest.raises(ValueError, match="not a file"):
+                DocumentParser().probe(str(path))
+
+    def test_ingest_validates_before_probing(self, temp_workspace, monkeypatch):
+        """Test that ingesting a directory is a validation failure and never probes it."""
+        from src.memory.document_parser import DocumentParser
+        from src.memory.ingestion_pipeline import IngestionPipeline
+        from src.memory.input_sanitizer import InputSanitizer
+        parser = DocumentParser()
+        monkeypatch.setattr(parser, "probe", lambda *args, **kwargs: pytest.fail("directory was probed"))
+        pipeline = IngestionPipeline(s3_client=object(), sanitizer=InputSanitizer(), parser=parser, vector_store=object(), embedding_service=object())
+
+        with pytest.raises(ValueError, match="File validation failed"):
+            pipeline.ingest_file(str(temp_workspace))
+
+    def test_chunk_stream_matches_chunk_text(self):
+        """Test that streamed chunking yields the same chunks as chunking the joined text."""
+        from src.memory.document_parser import DocumentParser
+        parser = DocumentParser()
+        parts = ["First sentence. Second one! " * 20, "A question? " * 30, "tail"]
+
+        assert list(parser.chunk_stream(parts, 100, 10)) == parser.chunk_text("\n".join(parts), 100, 10)
+
+class TestInputSanitizer:
+    """Test upload validation."""
+
+    def test_validate_files_keeps_order(self, temp_workspace):
+        """Test that batch validation returns one result per path, in order."""
+        from src.memory.input_sanitizer import InputSanitizer
+        good = temp_workspace / "notes.txt"
+        good.write_text("plain text")
+        bad = temp_workspace / "payload.exe"
+        bad.write_bytes(b"MZ")
+
+        results = InputSanitizer().validate_files([str(good), str(bad), str(good)])
+
+        assert [result.is_valid for result in results] == [True, False, True]
+
+    def test_oversized_file_not_hashed(self, temp_workspace, monkeypatch):
+        """Test that a file over the size limit is scanned without hashing it first."""
+        from src.memory.input_sanitizer import InputSanitizer
+        sanitizer = InputSanitizer()
+        sanitizer.clamav_enabled = True
+        sanitizer.max_size_bytes = 8
+        scans = []
+        monkeypatch.setattr(sanitizer, "_content_digest", lambda path: pytest.fail("oversized file was hashed"))
+        monkeypatch.setattr(sanitizer, "_scan_malware", lambda path, size, digest: scans.append(digest) or (True, ""))
+        path = temp_workspace / "notes.txt"
+        path.write_text("more than eight bytes")
+
+        assert not sanitizer.validate_file(str(path)).is_valid
+        assert scans == [None]
+
+class TestQueryCache:
+    """Test the document search result cache."""
+
+    def test_lru_eviction_and_invalidate(self):
+        """Test that the least recently used entry is evicted and invalidate clears all."""
+        from src.memory.query_cache import QueryCache
+        cache = QueryCache(max_entries=2, ttl_seconds=60)
+        cache.put("a", [1])
+        cache.put("b", [2])
+        assert cache.get("a") == [1]
+        cache.put("c", [3])
+
+        assert cache.get("b") is None
+        assert cache.get("a") == [1]
+        assert cache.stats()["evictions"] == 1
+
+        cache.invalidate()
+        assert cache.get("a") is None
+
+    def test_expired_entries_miss(self):
+        """Test that entries past their TTL are not returned."""
+        from src.memory.query_cache import QueryCache
+        cache = QueryCache(ttl_seconds=0)
+        cache.put("a", [1])
+        assert cache.get("a") is None
+        assert cache.stats()["misses"] == 1
+
+
+class TestPatternMatcher:
+    """Test the dangerous pattern matcher."""
+
+    def test_matches_small_and_large_inputs(self):
+        """Test that matching is case-insensitive on both the regex and large-input paths."""
+        from src.tools.pattern_matcher import HYPERSCAN_MIN_LENGTH, PatternMatcher
+        matcher = PatternMatcher(["os.system", "eval("])
+        padding = "x = 1\n" * HYPERSCAN_MIN_LENGTH
+
+        assert matcher.search("EVAL(payload)").lower() == "eval("
+        assert matcher.search(padding + "OS.SYSTEM('ls')").lower() == "os.system"
+        assert matcher.search(padding) is None
+
+
 class TestDockerSandbox:
     """Test Docker sandbox execution."""
     
@@ -290,6 +481,102 @@ class TestAuditor:
         risk, explanation = auditor.assess_task_risk(task)
         assert risk in [RiskLevel.HIGH, RiskLevel.CRITICAL]
 
+class TestRetryPolicy:
+    """Test retry backoff policy."""
+
+    def test_backoff_bounded(self):
+        """Test that decorrelated-jitter delays stay within bounds."""
+        from src.agent.state import RetryPolicy
+        policy = RetryPolicy(initial_delay_ms=100, max_delay_ms=1000, multiplier=3.0)
+
+        delay = 0.0
+        for _ in range(20):
+            delay = policy.next_delay_ms(delay)
+            assert 100 <= delay <= 1000
+
+    def test_backoff_without_jitter_is_exponential(self):
+        """Test that zero jitter yields plain exponential growth."""
+        from src.agent.state import RetryPolicy
+        policy = RetryPolicy(initial_delay_ms=100, max_delay_ms=10000, multiplier=2.0, jitter_fraction=0.0)
+
+        assert policy.next_delay_ms(0.0) == 100
+        assert policy.next_delay_ms(100) == 200
+        assert policy.next_delay_ms(8000) == 10000
+
+class TestMetrics:
+    """Test metrics collection."""
+
+    def test_summary_totals_span_labels(self):
+        """Test that summary totals add up every label combination."""
+        from src.observability.metrics import MetricsCollector
+        metrics = MetricsCollector()
+        metrics.record_request("success")
+        metrics.record_request("error")
+        metrics.record_guardrail_block("jailbreak")
+        metrics.record_sandbox_execution("python", True)
+        metrics.set_active_sessions(2)
+
+        summary = metrics.get_summary()
+
+        assert summary["requests"]["total"] == 2
+        assert summary["guardrails"]["blocks"] == 1
+        assert summary["sandbox"]["executions"] == 1
+        assert summary["active_sessions"] == 2
+
+class TestAgentState:
+    """Test agent state task bookkeeping."""
+
+    def test_task_index_tracks_plan(self):
+        """Test that completing and removing tasks keeps the index consistent."""
+        from src.agent.state import AgentState, Task, TaskStatus
+        state = AgentState()
+        state.set_plan([
+            Task(id="a", description="", tool="document_search", tool_input={}),
+            Task(id="b", description="", tool="document_search", tool_input={}, dependencies=["a"]),
+            Task(id="c", description="", tool="file_read", tool_input={}),
+        ])
+
+        assert state.get_next_task().id == "a"
+        state.mark_task_complete("a", "done")
+        assert state.is_task_completed("a")
+        assert state.get_task("a") is None
+        assert [t.id for t in state.current_plan] == ["b", "c"]
+
+        state.remove_task("c")
+        assert not state.is_planning_complete()
+        state.mark_task_failed("b", "boom")
+        assert [t.id for t in state.current_plan] == ["b"]
+        assert state.get_task("b").status == TaskStatus.FAILED
+        assert state.is_planning_complete()
+
+    def test_risk_levels_order_by_severity(self):
+        """Test that risk levels compare by severity but keep string values."""
+        from src.agent.state import RiskLevel
+        assert max(RiskLevel.MEDIUM, RiskLevel.HIGH) == RiskLevel.HIGH
+        assert sorted(RiskLevel, reverse=True)[0] == RiskLevel.CRITICAL
+        assert RiskLevel("low").value == "low"
+
+class TestPlanner:
+    """Test plan parsing."""
+
+    def test_parse_plan_tolerates_surrounding_text(self):
+        """Test that fenced plans with trailing prose are parsed."""
+        from src.agent.planner import Planner
+        from src.agent.state import RiskLevel
+        plan_text = (
+            "Here is the plan:\n```json\n"
+            '[{"id": "task_1", "description": "Search", "tool": "document_search", '
+            '"tool_input": {"query": "x"}, "risk_level": "high"}]\n'
+            "```\nLet me know if it looks right."
+        )
+
+        tasks = Planner.__new__(Planner)._parse_plan(plan_text)
+
+        assert len(tasks) == 1
+        assert tasks[0].risk_level == RiskLevel.HIGH
+        assert tasks[0].requires_approval
+
+
 class TestAgentTools:
     """Test agent tool integration."""
     
@@ -331,6 +618,56 @@ class TestAgentTools:
         assert "screenshot" in tool_names2
         assert "mouse_move" in tool_names2
         assert "keyboard_type" in tool_names2
+    
+    def test_sanitize_path_rejects_escapes(self, test_config, temp_workspace, monkeypatch):
+        """Test that traversal and symlink escapes resolve outside the workspace."""
+        monkeypatch.chdir(temp_workspace)
+        tools = AgentTools(config=test_config)
+        (temp_workspace / "outside_link").symlink_to("/etc")
+        
+        assert tools._sanitize_path("docs/../notes.txt") == str(temp_workspace.resolve() / "notes.txt")
+        
+        for path in ("../secret.txt", "outside_link/passwd", "/etc/passwd"):
+            with pytest.raises(ValueError):
+                tools._sanitize_path(path)
+    
+    def test_file_read_slice(self, test_config, temp_workspace, monkeypatch):
+        """Test partial and binary reads through file_read."""
+        monkeypatch.chdir(temp_workspace)
+        tools = AgentTools(config=test_config)
+        (temp_workspace / "app.log").write_bytes(b"line one\nline two\n")
+        
+        assert tools.file_read("app.log", offset=9, length=4)["content"] == "line"
+        assert tools.file_read("app.log", as_bytes=True)["content"] == b"line one\nline two\n"
+        assert tools.file_read("app.log", offset=100)["content"] == ""
+
+    def test_file_read_rejects_fifo(self, test_config, temp_workspace, monkeypatch):
+        """Test that reading a FIFO fails instead of blocking on open."""
+        monkeypatch.chdir(temp_workspace)
+        tools = AgentTools(config=test_config)
+        os.mkfifo(temp_workspace / "pipe")
+
+        with pytest.raises(ValueError, match="not a file"):
+            tools.file_read("pipe")
+
+    def test_tool_schemas_follow_registry(self):
+        """Test that tool schemas are read-only and agree with the registry's required fields."""
+        from src.agent.tool_registry import TOOL_SPECS, tool_schemas
+
+        for schema in tool_schemas(computer_use=True):
+            required = tuple(key for key, param in schema["parameters"].items() if param["required"])
+            assert required == TOOL_SPECS[schema["name"]].required
+            with pytest.raises(TypeError):
+                schema["parameters"]["injected"] = {}
+
+    def test_split_command_rejects_shell_syntax(self):
+        """Test that pipes, redirects and globs are not exec'd as literal arguments."""
+        assert AgentTools._split_command("grep 'a|b' notes.txt") == ["grep", "a|b", "notes.txt"]
+        assert AgentTools._split_command("find . -name \\*.py") == ["find", ".", "-name", "*.py"]
+
+        for command in ("ls | grep x", "echo hi > out.txt", "ls *.py", "make && make test", "echo $HOME"):
+            with pytest.raises(ValueError, match="use_shell"):
+                AgentTools._split_command(command)
 
 # Integration Tests
 